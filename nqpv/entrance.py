@@ -25,17 +25,18 @@ from .vsystem.var_scope import VarScope
 from .vsystem.log_system import LogSystem, RuntimeErrorWithLog
 
 def verify(path : str) -> None:
-    LogSystem("error", "Error: ")
-    LogSystem("warning", "Warning: ")
-    LogSystem("info")
+    # keep the channels at hand, instead of resolving them again for the summary
+    err = LogSystem("error", "Error: ")
+    warn = LogSystem("warning", "Warning: ")
+    info = LogSystem("info")
 
     try:
         vkernel.VKernel.process_module(path)
     except RuntimeErrorWithLog:
         pass
 
-    LogSystem("error").summary(None, True)
-    LogSystem("warning").summary(None, True)
-    LogSystem("info").summary(None, True)
+    err.summary(None, True)
+    warn.summary(None, True)
+    info.summary(None, True)
     
 
@@ -21,6 +21,7 @@
 
 from __future__ import annotations
 from typing import Any, List, Tuple, Dict
+from weakref import WeakValueDictionary
 
 from nqpv.vsystem.var_scope import VVar
 from nqpv.vsystem.log_system import RuntimeErrorWithLog
@@ -31,33 +32,78 @@ from .opt_term import OperatorTerm, MeasureTerm
 
 
 
+def _check_pair(opt : VVar, opt_type : type, type_desc : str, qvarls : QvarlsTerm) -> None:
+    '''
+    check the operator (of type opt_type) and the qvarls to form a pair, shared by OptPairTerm and MeaPairTerm
+    type_desc: the description of opt_type in the error message
+    '''
+    if not isinstance(opt, opt_type):
+        raise RuntimeErrorWithLog("The term '" + opt.name + "' is not " + type_desc + ".")
+    
+    if not isinstance(qvarls, QvarlsTerm):
+        raise RuntimeErrorWithLog("The term '" + str(qvarls) + "' is not a quantum variable list")
+    
+    if not opt.is_two_valued():     # type: ignore
+        raise RuntimeErrorWithLog("The operator '" + opt.name + "' can not be used here. All indices must be 2 valued.")
+
+    # check the qubit number
+    if opt.qnum != qvarls.qnum:     # type: ignore
+        raise RuntimeErrorWithLog("The operator '" + opt.name + "' and the quantum variable list '" + 
+            str(qvarls) + "' does not match on qubit numbers.")
+
+# the living operator-variable pairs, indexed by the ids of their operator and qvarls
+# (a pair keeps its components alive, so the ids of an entry can not be reused)
+_opt_pair_pool : WeakValueDictionary[Tuple[int, int], OptPairTerm] = WeakValueDictionary()
+
 class OptPairTerm(VVar):
-    def __init__(self, opt : VVar, qvarls : QvarlsTerm):
-        super().__init__()
+    # __weakref__ for the pool of pairs
+    __slots__ = ("_opt", "_qvarls", "__weakref__")
 
-        if not isinstance(opt, OperatorTerm):
-            raise RuntimeErrorWithLog("The term '" + opt.name + "' is not an operator.")
-        
-        if not isinstance(qvarls, QvarlsTerm):
-            raise RuntimeErrorWithLog("The term '" + str(qvarls) + "' is not a quantum variable list")
+    def __new__(cls, opt : VVar, qvarls : QvarlsTerm):
+        '''
+        flyweight design: the pairs of the same operator and qvarls are shared
+        '''
+        key = (id(opt), id(qvarls))
+        pair = _opt_pair_pool.get(key)
+        if pair is not None:
+            return pair
+
+        _check_pair(opt, OperatorTerm, "an operator", qvarls)
         
-        try:
-            opt.qnum
-        except ValueError:
-            raise RuntimeErrorWithLog("The operator '" + opt.name + "' can not be used here. All indices must be 2 valued.")
+        return OptPairTerm._pooled(opt, qvarls, key)
 
+    @staticmethod
+    def _pooled(opt : OperatorTerm, qvarls : QvarlsTerm, key : Tuple[int, int]) -> OptPairTerm:
+        pair = object.__new__(OptPairTerm)
+        VVar.__init__(pair)
+        pair._opt = opt
+        pair._qvarls = qvarls
 
-        # check the qubit number
-        if opt.qnum != qvarls.qnum:
-            raise RuntimeErrorWithLog("The operator '" + opt.name + "' and the quantum variable list '" + 
-                str(qvarls) + "' does not match on qubit numbers.")
-        
-        self._opt : OperatorTerm = opt
-        self._qvarls : QvarlsTerm = qvarls
+        _opt_pair_pool[key] = pair
+        return pair
+
+    @staticmethod
+    def _unchecked(opt : OperatorTerm, qvarls : QvarlsTerm) -> OptPairTerm:
+        '''
+        the pair of an operator and a qvarls already known to match (derived from checked pairs),
+        which skips _check_pair
+        '''
+        key = (id(opt), id(qvarls))
+        pair = _opt_pair_pool.get(key)
+        if pair is not None:
+            return pair
+        return OptPairTerm._pooled(opt, qvarls, key)
+
+    def __init__(self, opt : VVar, qvarls : QvarlsTerm):
+        '''
+        the pair is checked and set up in __new__
+        '''
+        self._opt : OperatorTerm
+        self._qvarls : QvarlsTerm
     
     @property
     def str_type(self) -> str:
-        return "opt_pair " + str(self.qvarls.qnum) + " qubit"
+        return "opt_pair " + str(self._qvarls.qnum) + " qubit"
 
     @property
     def opt(self) -> OperatorTerm:
@@ -69,26 +115,33 @@ class OptPairTerm(VVar):
 
     @property
     def unitary_pair(self) -> bool:
-        return self.opt.unitary
+        return self._opt.unitary
     
     @property
     def hermitian_predicate_pair(self) -> bool:
-        return self.opt.hermitian_predicate
+        return self._opt.hermitian_predicate
     
     def __eq__(self, other) -> bool:
-            if isinstance(other, OptPairTerm):
-                return self.opt == other.opt and self.qvarls == other.qvarls
-            else:
-                return False    
+        if self is other:
+            return True
+        if isinstance(other, OptPairTerm):
+            # the qvarls (hashed) are compared before the operators (compared within EPS)
+            return self._qvarls == other._qvarls and self._opt == other._opt
+        else:
+            return False
+
+    def __hash__(self) -> int:
+        # operators are compared within EPS, so only the qvarls take part in the hash
+        return hash(self._qvarls)
 
     def __str__(self) -> str:
-        return self.opt.name + str(self.qvarls)
+        return self._opt.name + str(self._qvarls)
 
     def dagger(self) -> OptPairTerm:
         '''
         return the dagger operator
         '''
-        return OptPairTerm(self.opt.dagger(), self._qvarls)
+        return OptPairTerm._unchecked(self._opt.dagger(), self._qvarls)
     
     def __add__(self, other : OptPairTerm) -> OptPairTerm:
         '''
@@ -96,48 +149,42 @@ class OptPairTerm(VVar):
         '''
         if not isinstance(other, OptPairTerm):
             raise ValueError()
-        if self.qvarls != other.qvarls:
+        # fast path: the common case of the same qvarls object
+        if self._qvarls is other._qvarls:
+            return OptPairTerm._unchecked(self._opt + other._opt, self._qvarls)
+        if self._qvarls != other._qvarls:
             # automatic extension for hermitian pairs
-            if self.hermitian_predicate_pair and other.hermitian_predicate_pair:
-                all_qvarls = self.qvarls.join(other.qvarls)
-                new_self = hermitian_extend(self, all_qvarls)
-                new_other = hermitian_extend(other, all_qvarls)
-                return OptPairTerm(new_self.opt + new_other.opt, all_qvarls)
+            if self._opt.hermitian_predicate and other._opt.hermitian_predicate:
+                all_qvarls = self._qvarls.join(other._qvarls)
+                # both operands are extended and added in one go, without building the two extensions
+                new_m = opt_kernel.hermitian_extend_add(all_qvarls.vls,
+                    self._opt.m, self._qvarls.vls, other._opt.m, other._qvarls.vls)
+                return OptPairTerm._unchecked(OperatorTerm(new_m), all_qvarls)
             else:
                 raise ValueError()
         else:
-            return OptPairTerm(self.opt + other.opt, self.qvarls)
+            return OptPairTerm._unchecked(self._opt + other._opt, self._qvarls)
 
     def qvar_substitute(self, correspondence : Dict[str, str]) -> OptPairTerm:
-        return OptPairTerm(self._opt, self.qvarls.qvar_substitute(correspondence))
+        new_qvarls = self._qvarls.qvar_substitute(correspondence)
+        if new_qvarls is self._qvarls:
+            return self
+        return OptPairTerm._unchecked(self._opt, new_qvarls)
 
 class MeaPairTerm(VVar):
+    __slots__ = ("_mea", "_qvarls")
+
     def __init__(self, mea : VVar, qvarls : QvarlsTerm):
         super().__init__()
 
-        if not isinstance(mea, MeasureTerm):
-            raise RuntimeErrorWithLog("The term '" + str(mea) + "' is not a measurement.")
-        
-        if not isinstance(qvarls, QvarlsTerm):
-            raise RuntimeErrorWithLog("The term '" + str(qvarls) + "' is not a quantum variable list")
-
-        try:
-            mea.qnum
-        except ValueError:
-            raise RuntimeErrorWithLog("The operator '" + str(mea) + "' can not be used here. All indices must be 2 valued.")
-
-
-        # check the qubit number
-        if mea.qnum != qvarls.qnum:
-            raise RuntimeErrorWithLog("The operator '" + str(mea) + "' and the quantum variable list '" + 
-                str(qvarls) + "' does not match on qubit numbers.")
+        _check_pair(mea, MeasureTerm, "a measurement", qvarls)
         
         self._mea : MeasureTerm = mea
         self._qvarls : QvarlsTerm = qvarls
 
     @property
     def str_type(self) -> str:
-        return "opt_pair " + str(self.qvarls.qnum) + " qubit"
+        return "opt_pair " + str(self._qvarls.qnum) + " qubit"
 
     @property
     def mea(self) -> MeasureTerm:
@@ -145,38 +192,48 @@ class MeaPairTerm(VVar):
 
     @property
     def mea0(self) -> OptPairTerm:
-        return OptPairTerm(self.mea.m0, self.qvarls)
+        return OptPairTerm._unchecked(self._mea.m0, self._qvarls)
 
     @property
     def mea1(self) -> OptPairTerm:
-        return OptPairTerm(self.mea.m1, self.qvarls)
+        return OptPairTerm._unchecked(self._mea.m1, self._qvarls)
     
     @property
     def qvarls(self) -> QvarlsTerm:
         return self._qvarls
 
     def __eq__(self, other) -> bool:
-        raise NotImplemented
+        if self is other:
+            return True
+        if isinstance(other, MeaPairTerm):
+            # the qvarls (hashed) are compared before the measurements (compared within EPS)
+            return self._qvarls == other._qvarls and self._mea == other._mea
+        else:
+            return False
+
+    def __hash__(self) -> int:
+        # measurements are compared within EPS, so only the qvarls take part in the hash
+        return hash(self._qvarls)
     
     def __str__(self) -> str:
-        return self.mea.name + str(self.qvarls)
+        return self._mea.name + str(self._qvarls)
 
     def dagger(self) -> MeaPairTerm:
         '''
         return the dagger operator
         '''
-        return MeaPairTerm(self.mea.dagger(), self._qvarls)
+        return MeaPairTerm(self._mea.dagger(), self._qvarls)
 
 
 def hermitian_I(all_qvarls : QvarlsTerm) -> OptPairTerm:
-    if not isinstance(all_qvarls, QvarlsTerm):
-        raise ValueError()
+    # internal usage errors, stripped under 'python -O'
+    if __debug__:
+        if not isinstance(all_qvarls, QvarlsTerm):
+            raise ValueError()
     # produce the I operator
     m = opt_kernel.eye_tensor(len(all_qvarls))
-    opt = OperatorTerm(m)
-    opt.ensure_hermitian_predicate()
-    opt.ensure_unitary()
-    return OptPairTerm(opt, all_qvarls)
+    opt = OperatorTerm(m, unitary=True, hermitian_predicate=True)
+    return OptPairTerm._unchecked(opt, all_qvarls)
 
 
 def hermitian_contract(H : OptPairTerm, M : OptPairTerm) -> OptPairTerm:
@@ -184,8 +241,9 @@ def hermitian_contract(H : OptPairTerm, M : OptPairTerm) -> OptPairTerm:
     scope : the scope to preserve the newly created operators
     <automatic extension>
     '''
-    if not isinstance(H, OptPairTerm) or not isinstance(M, OptPairTerm):
-        raise ValueError()
+    if __debug__:
+        if not isinstance(H, OptPairTerm) or not isinstance(M, OptPairTerm):
+            raise ValueError()
     if not H.hermitian_predicate_pair:
         raise RuntimeErrorWithLog("The operator variable pair '" + str(H) + "' is not a hermitian predicate pair.")
     
@@ -195,18 +253,18 @@ def hermitian_contract(H : OptPairTerm, M : OptPairTerm) -> OptPairTerm:
         H = hermitian_extend(H, extended_qvarls)
 
     new_m = opt_kernel.hermitian_contract(H.qvarls.vls, H.opt.m, M.qvarls.vls, M.opt.m)
-    new_opt = OperatorTerm(new_m)
-    new_opt.ensure_hermitian_predicate()
+    new_opt = OperatorTerm(new_m, hermitian_predicate=True)
 
-    return OptPairTerm(new_opt, H.qvarls)
+    return OptPairTerm._unchecked(new_opt, H.qvarls)
 
 def hermitian_init(H : OptPairTerm, qvarls : QvarlsTerm) -> OptPairTerm:
     '''
     scope : the scope to preserve the newly created operators
     <automatic extension>
     '''
-    if not isinstance(H, OptPairTerm) or not isinstance(qvarls, QvarlsTerm):
-        raise ValueError()
+    if __debug__:
+        if not isinstance(H, OptPairTerm) or not isinstance(qvarls, QvarlsTerm):
+            raise ValueError()
     if not H.hermitian_predicate_pair:
         raise RuntimeErrorWithLog("The operator variable pair '" + str(H) + "' is not a hermitian predicate pair.")
     
@@ -216,17 +274,17 @@ def hermitian_init(H : OptPairTerm, qvarls : QvarlsTerm) -> OptPairTerm:
         H = hermitian_extend(H, extended_qvarls)
 
     new_m = opt_kernel.hermitian_init(H.qvarls.vls, H.opt.m, qvarls.vls)
-    new_opt = OperatorTerm(new_m)
-    new_opt.ensure_hermitian_predicate()
+    new_opt = OperatorTerm(new_m, hermitian_predicate=True)
 
-    return OptPairTerm(new_opt, H.qvarls)
+    return OptPairTerm._unchecked(new_opt, H.qvarls)
 
 def hermitian_extend(H : OptPairTerm, all_qvarls : QvarlsTerm) -> OptPairTerm:
     '''
     scope : the scope to preserve the newly created operators
     '''
-    if not isinstance(H, OptPairTerm) or not isinstance(all_qvarls, QvarlsTerm):
-        raise ValueError()
+    if __debug__:
+        if not isinstance(H, OptPairTerm) or not isinstance(all_qvarls, QvarlsTerm):
+            raise ValueError()
     if not H.hermitian_predicate_pair:
         raise RuntimeErrorWithLog("The operator variable pair '" + str(H) + "' is not a hermitian predicate pair.")
     
@@ -238,7 +296,6 @@ def hermitian_extend(H : OptPairTerm, all_qvarls : QvarlsTerm) -> OptPairTerm:
         return H
 
     new_m = opt_kernel.hermitian_extend(all_qvarls.vls,  H.opt.m, H.qvarls.vls)
-    new_opt = OperatorTerm(new_m)
-    new_opt.ensure_hermitian_predicate()
+    new_opt = OperatorTerm(new_m, hermitian_predicate=True)
 
-    return OptPairTerm(new_opt, all_qvarls)
\ No newline at end of file
+    return OptPairTerm._unchecked(new_opt, all_qvarls)
\ No newline at end of file
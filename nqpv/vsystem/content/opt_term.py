@@ -30,9 +30,10 @@ class OperatorTerm(VVar):
     '''
     type of ordinary operators
     '''
-    def __init__(self, m : np.ndarray):
+    def __init__(self, m : np.ndarray, *, unitary : bool | None = None, hermitian_predicate : bool | None = None):
         '''
         every operator must have a name
+        unitary, hermitian_predicate: the properties already known by the creator (None for unknown)
         '''
         super().__init__()
 
@@ -40,8 +41,11 @@ class OperatorTerm(VVar):
             raise ValueError()
 
         self._m : np.ndarray = m
-        self._unitary : bool | None = None
-        self._hermitian_predicate : bool | None = None
+        self._qnum : int | None = None
+        self._unitary : bool | None = unitary
+        self._hermitian_predicate : bool | None = hermitian_predicate
+        # the string of the tensor, which is expensive for large operators
+        self._str_cache : str | None = None
     
 
     @property
@@ -50,13 +54,24 @@ class OperatorTerm(VVar):
 
     @property
     def qnum(self) -> int:
-        return opt_kernel.get_opt_qnum(self._m)
+        if self._qnum is None:
+            self._qnum = opt_kernel.get_opt_qnum(self._m)
+        return self._qnum
+
+    def is_two_valued(self) -> bool:
+        '''
+        whether all indices of the tensor are 2 valued, i.e. whether qnum is defined
+        '''
+        return self._qnum is not None or all(dim == 2 for dim in self._m.shape)
 
     def ensure_unitary(self) -> None:
         self._unitary = True
+        # the output form depends on the properties
+        self._str_cache = None
     
     def ensure_hermitian_predicate(self) -> None:
         self._hermitian_predicate = True
+        self._str_cache = None
     
     @property
     def unitary(self) -> bool:
@@ -79,11 +94,13 @@ class OperatorTerm(VVar):
             return False
     
     def __str__(self) -> str:
-        # output according to its property
-        if self.hermitian_predicate or self.unitary:
-            return str(self._m.reshape((2**self.qnum, 2**self.qnum)))
-        else:
-            return str(self._m)
+        if self._str_cache is None:
+            # output according to its property
+            if self.hermitian_predicate or self.unitary:
+                self._str_cache = str(self._m.reshape((2**self.qnum, 2**self.qnum)))
+            else:
+                self._str_cache = str(self._m)
+        return self._str_cache
 
     def dagger(self) -> OperatorTerm:
         '''
@@ -145,6 +162,12 @@ class MeasureTerm(VVar):
     @property
     def qnum(self) -> int:
         return opt_kernel.get_opt_qnum(self._m0)
+
+    def is_two_valued(self) -> bool:
+        '''
+        whether all indices of the measurement operators are 2 valued, i.e. whether qnum is defined
+        '''
+        return all(dim == 2 for dim in self._m0.shape)
     
     def __eq__(self, other) -> bool:
         if self is other:
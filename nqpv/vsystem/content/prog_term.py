@@ -25,11 +25,14 @@ from typing import Any, List, Dict, Tuple
 from nqpv.vsystem.log_system import RuntimeErrorWithLog
 from nqpv.vsystem.var_scope import VVar
 
-from .qvarls_term import QvarlsTerm
+from .qvarls_term import QvarlsTerm, EMPTY_QVARLS
 from .opt_pair_term import OptPairTerm, MeaPairTerm
+from .term_helper import child_prefix, render_pieces
 
 
 class ProgSttTerm(VVar):
+    __slots__ = ("_all_qvarls",)
+
     def __init__(self, all_qvarls : QvarlsTerm):
         super().__init__()
 
@@ -50,28 +53,66 @@ class ProgSttTerm(VVar):
         return "\n" + self.str_content("") + "\n"
     
     def str_content(self, prefix : str) -> str:
-        raise NotImplementedError()
+        return render_pieces(self, prefix)
 
-    def __eq__(self, other) -> bool:
-        raise NotImplemented
+    def content_pieces(self, prefix : str) -> List[Any]:
+        '''
+        the pieces of str_content in order: a string is output as it is,
+        and a pair (sub statement, prefix) stands for the content of the sub statement
+        '''
+        raise NotImplementedError()
 
 
 class SkipTerm(ProgSttTerm):
+    __slots__ = ()
+    _instance : SkipTerm | None = None
+
+    def __new__(cls):
+        '''
+        single case design (skip carries no data)
+        '''
+        if SkipTerm._instance is None:
+            skip = super().__new__(cls)
+            ProgSttTerm.__init__(skip, EMPTY_QVARLS)
+            SkipTerm._instance = skip
+        return SkipTerm._instance
+
     def __init__(self):
-        super().__init__(QvarlsTerm(()))
+        '''
+        the term is set up in __new__
+        '''
+        pass
     
-    def str_content(self, prefix: str) -> str:
-        return prefix + "skip"
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + "skip"]
 
 class AbortTerm(ProgSttTerm):
+    __slots__ = ()
+    _instance : AbortTerm | None = None
+
+    def __new__(cls):
+        '''
+        single case design (abort carries no data)
+        '''
+        if AbortTerm._instance is None:
+            abort = super().__new__(cls)
+            ProgSttTerm.__init__(abort, EMPTY_QVARLS)
+            AbortTerm._instance = abort
+        return AbortTerm._instance
+
     def __init__(self):
-        super().__init__(QvarlsTerm(()))
+        '''
+        the term is set up in __new__
+        '''
+        pass
 
-    def str_content(self, prefix: str) -> str:
-        return prefix + "abort"
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + "abort"]
 
 
 class InitTerm(ProgSttTerm):
+    __slots__ = ("_qvarls",)
+
     def __init__(self, qvarls : QvarlsTerm):
         if not isinstance(qvarls, QvarlsTerm):
             raise ValueError()
@@ -83,38 +124,38 @@ class InitTerm(ProgSttTerm):
     def qvarls_val(self) -> QvarlsTerm:
         return self._qvarls
 
-    def str_content(self, prefix: str) -> str:
-        return prefix + str(self._qvarls) + " *=0"
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._qvarls) + " *=0"]
 
 
 class UnitaryTerm(ProgSttTerm):
+    __slots__ = ("_opt_pair",)
+
     def __init__(self, opt_pair : OptPairTerm):
         if not isinstance(opt_pair, OptPairTerm):
             raise ValueError()
         # check for unitary opt pair
-        if not opt_pair.unitary_pair:
+        if not opt_pair._opt.unitary:
             raise RuntimeErrorWithLog("The operator variable pair '" + str(opt_pair) + "' is not an unitary pair.")
             
-        super().__init__(opt_pair.qvarls)
+        super().__init__(opt_pair._qvarls)
         self._opt_pair : OptPairTerm = opt_pair
 
     @property
     def opt_pair(self) -> OptPairTerm:
         return self._opt_pair
 
-
-    def str_content(self, prefix: str) -> str:
-        return prefix + str(self.opt_pair.qvarls) + " *= " + self.opt_pair.opt.name
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._opt_pair._qvarls) + " *= " + self._opt_pair._opt.name]
 
 class IfTerm(ProgSttTerm):
+    __slots__ = ("_opt_pair", "_S1", "_S0")
+
     def __init__(self, opt_pair : MeaPairTerm, S1 : ProgSttTerm, S0 : ProgSttTerm):
         if not isinstance(opt_pair, MeaPairTerm) or not isinstance(S1, ProgSttTerm) or not isinstance(S0, ProgSttTerm):
             raise ValueError()
         
-        all_qvarls = opt_pair.qvarls
-        all_qvarls = all_qvarls.join(S1.all_qvarls)
-        all_qvarls = all_qvarls.join(S0.all_qvarls)
-        super().__init__(all_qvarls)
+        super().__init__(QvarlsTerm.union_many((opt_pair.qvarls, S1.all_qvarls, S0.all_qvarls)))
         self._opt_pair : MeaPairTerm = opt_pair
         self._S1 : ProgSttTerm = S1
         self._S0 : ProgSttTerm = S0
@@ -131,22 +172,22 @@ class IfTerm(ProgSttTerm):
     def S0(self) -> ProgSttTerm:
         return self._S0
 
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "if " + str(self._opt_pair) + " then\n"
-        r += self.S1.str_content(prefix + "\t") + "\n"
-        r += prefix + "else\n"
-        r += self.S0.str_content(prefix + "\t") + "\n"
-        r += prefix + "end"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        sub_prefix = child_prefix(prefix)
+        return [prefix + "if " + str(self._opt_pair) + " then\n",
+            (self._S1, sub_prefix),
+            "\n" + prefix + "else\n",
+            (self._S0, sub_prefix),
+            "\n" + prefix + "end"]
 
 class WhileTerm(ProgSttTerm):
+    __slots__ = ("_opt_pair", "_S")
+
     def __init__(self, opt_pair : MeaPairTerm, S : ProgSttTerm):
         if not isinstance(opt_pair, MeaPairTerm) or not isinstance(S, ProgSttTerm):
             raise ValueError()
 
-        all_qvarls = opt_pair.qvarls
-        all_qvarls = all_qvarls.join(S.all_qvarls)
-        super().__init__(all_qvarls)
+        super().__init__(QvarlsTerm.union_many((opt_pair.qvarls, S.all_qvarls)))
         self._opt_pair : MeaPairTerm = opt_pair
         self._S : ProgSttTerm = S
 
@@ -158,25 +199,24 @@ class WhileTerm(ProgSttTerm):
     def S(self) -> ProgSttTerm:
         return self._S
 
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "while " + str(self._opt_pair) + " do\n"
-        r += self.S.str_content(prefix + "\t") + "\n"
-        r += prefix + "end"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + "while " + str(self._opt_pair) + " do\n",
+            (self._S, child_prefix(prefix)),
+            "\n" + prefix + "end"]
 
 class NondetTerm(ProgSttTerm):
+    __slots__ = ("_subprog_ls",)
+
     def __init__(self, subprog_ls : Tuple[ProgSttTerm,...]):
         if not isinstance(subprog_ls, tuple):
             raise ValueError()
 
-        all_qvarls = QvarlsTerm(())
-        # example each item in the tuple
-        for item in subprog_ls:
-            if not isinstance(item, ProgSttTerm):
+        # example each item in the tuple (internal usage errors, stripped under 'python -O')
+        if __debug__:
+            if not all(isinstance(item, ProgSttTerm) for item in subprog_ls):
                 raise ValueError()
-            all_qvarls = all_qvarls.join(item.all_qvarls)
         
-        super().__init__(all_qvarls)
+        super().__init__(QvarlsTerm.union_many(item._all_qvarls for item in subprog_ls))
         self._subprog_ls : Tuple[ProgSttTerm,...] = subprog_ls
 
     def get_stt(self, i : int) -> ProgSttTerm:
@@ -185,42 +225,45 @@ class NondetTerm(ProgSttTerm):
     def __len__(self) -> int:
         return len(self._subprog_ls)
 
-    
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "(\n"
-        r += self.get_stt(0).str_content(prefix + "\t") + "\n"
-        for i in range(1, len(self._subprog_ls)):
-            r += prefix + "#\n"
-            r += self.get_stt(i).str_content(prefix + "\t") + "\n"
-        r += prefix + ")"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        sub_prefix = child_prefix(prefix)
+        sep = "\n" + prefix + "#\n"
+        pieces : List[Any] = [prefix + "(\n"]
+        for i, item in enumerate(self._subprog_ls):
+            if i > 0:
+                pieces.append(sep)
+            pieces.append((item, sub_prefix))
+        pieces.append("\n" + prefix + ")")
+        return pieces
 
 
 class ProgSttSeqTerm(ProgSttTerm):
     '''
     A sequence of program statements. This is the structure for programs we are dealing with.
     '''
+    __slots__ = ("_stt_ls",)
+
     def __init__(self, stt_ls : Tuple[ProgSttTerm,...]):
         if not isinstance(stt_ls, tuple):
             raise ValueError()
         if len(stt_ls) == 0:
             raise ValueError()
 
-        all_qvarls = QvarlsTerm(())
-        for item in stt_ls:
-            if not isinstance(item, ProgSttTerm):
-                raise ValueError()
-            all_qvarls = all_qvarls.join(item.all_qvarls)
-
-        super().__init__(all_qvarls)
-        # flatten the sequential composition
-        flattened = ()
+        # check the items, collect the variables and flatten the sequential composition in one pass
+        qvarls_ls : List[QvarlsTerm] = []
+        flattened : List[ProgSttTerm] = []
         for item in stt_ls:
+            if __debug__:
+                if not isinstance(item, ProgSttTerm):
+                    raise ValueError()
+            qvarls_ls.append(item._all_qvarls)
             if isinstance(item, ProgSttSeqTerm):
-                flattened = flattened + item._stt_ls
+                flattened.extend(item._stt_ls)
             else:
-                flattened = flattened + (item,)
-        self._stt_ls : Tuple[ProgSttTerm,...] = flattened
+                flattened.append(item)
+
+        super().__init__(QvarlsTerm.union_many(qvarls_ls))
+        self._stt_ls : Tuple[ProgSttTerm,...] = tuple(flattened)
         
     def __len__(self) -> int:
         return len(self._stt_ls)
@@ -228,17 +271,13 @@ class ProgSttSeqTerm(ProgSttTerm):
     def get_stt(self, i : int) -> ProgSttTerm:
         return self._stt_ls[i]
 
-    def str_content(self, prefix: str) -> str:
-        if len(self._stt_ls) == 1:
-            return self.get_stt(0).str_content(prefix)
-        elif len(self._stt_ls) > 1:
-            r = ""
-            for i in range(len(self._stt_ls)-1):
-                r += self.get_stt(i).str_content(prefix) + ";\n"
-            r += self.get_stt(len(self._stt_ls)-1).str_content(prefix)
-            return r
-        else:
-            raise Exception()
+    def content_pieces(self, prefix : str) -> List[Any]:
+        pieces : List[Any] = []
+        for i, item in enumerate(self._stt_ls):
+            if i > 0:
+                pieces.append(";\n")
+            pieces.append((item, prefix))
+        return pieces
 
 
 class ProgDefinedTerm(VVar):
@@ -246,6 +285,8 @@ class ProgDefinedTerm(VVar):
     A program term, with the specification of parameter variable list.
     This is the program signature, so there is no methods "eval" or "arg_apply"
     '''
+    __slots__ = ("_prog_seq", "_arg_ls", "_all_qvarls")
+
     def __init__(self, prog_seq : ProgSttTerm, arg_ls : QvarlsTerm):
         '''
         '''
@@ -256,7 +297,8 @@ class ProgDefinedTerm(VVar):
 
         self._prog_seq : ProgSttTerm = prog_seq
         self._arg_ls : QvarlsTerm = arg_ls
-        self._all_qvarls : QvarlsTerm = arg_ls.join(self.prog_seq.all_qvarls)
+        # computed on the first request
+        self._all_qvarls : QvarlsTerm | None = None
 
     @property
     def str_type(self) -> str:
@@ -268,6 +310,8 @@ class ProgDefinedTerm(VVar):
 
     @property
     def all_qvarls(self) -> QvarlsTerm:
+        if self._all_qvarls is None:
+            self._all_qvarls = self._arg_ls.join(self._prog_seq._all_qvarls)
         return self._all_qvarls
 
     @property
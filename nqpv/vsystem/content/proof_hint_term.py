@@ -20,23 +20,50 @@
 # ------------------------------------------------------------
 
 from __future__ import annotations
-from typing import List, Tuple
+from typing import Any, List, Tuple
 
 from nqpv.vsystem.log_system import RuntimeErrorWithLog
 from nqpv.vsystem.var_scope import VVar
 
-from .qvarls_term import QvarlsTerm
+from .qvarls_term import QvarlsTerm, EMPTY_QVARLS
 from .opt_pair_term import OptPairTerm, MeaPairTerm
 from .qpre_term import QPreTerm
+from .term_helper import child_prefix, render_pieces
 
 
+def _require_mea_pair(term : VVar) -> None:
+    if not isinstance(term, MeaPairTerm):
+        raise RuntimeErrorWithLog("The term '" + str(term) + "' is not a measurement.")
+
+def _require_hint(term : VVar) -> None:
+    if not isinstance(term, ProofHintTerm):
+        raise RuntimeErrorWithLog("The term '" + str(term) + "' is not a proof hint.")
+
+def _list_pieces(proof_hints : Tuple[ProofHintTerm,...], prefix : str, sep : str) -> List[Any]:
+    '''
+    the content pieces of a bracketed list of hints, separated by sep (for nondeterministic and union hints)
+    '''
+    sub_prefix = child_prefix(prefix)
+    sep_line = "\n" + prefix + sep + "\n"
+    pieces : List[Any] = [prefix + "(\n"]
+    for i, item in enumerate(proof_hints):
+        if i > 0:
+            pieces.append(sep_line)
+        pieces.append((item, sub_prefix))
+    pieces.append("\n" + prefix + ")")
+    return pieces
+
 
 class ProofHintTerm(VVar):
-    def __init__(self, all_qvarls : QvarlsTerm, label : str):
+    __slots__ = ("_all_qvarls", "_label", "_prog_hash")
+
+    def __init__(self, all_qvarls : QvarlsTerm, label : str, prog_hash : int):
         super().__init__()
 
         self._all_qvarls : QvarlsTerm = all_qvarls
         self._label : str = label
+        # a fingerprint of the program, equal for prog_consistent hints of the same class
+        self._prog_hash : int = prog_hash
 
     @property
     def str_type(self) -> str:
@@ -54,96 +81,143 @@ class ProofHintTerm(VVar):
         '''
         check whether the two proof hints are about the same program (syntactically)
         '''
+        # a shared hint is consistent with itself, without walking it
+        if self is other:
+            return True
+        # the hint classes do not inherit from each other, so hints of different classes never match
+        if type(self) is not type(other):
+            return False
+        # different fingerprints rule out the same program, without walking the hints
+        if self._prog_hash != other._prog_hash:
+            return False
+        return self._prog_consistent_impl(other)
+
+    def _prog_consistent_impl(self, other : ProofHintTerm) -> bool:
+        '''
+        the check of prog_consistent, where other is a different hint of the same class
+        '''
         raise NotImplementedError()
 
     def str_content(self, prefix : str) -> str:
+        return render_pieces(self, prefix)
+
+    def content_pieces(self, prefix : str) -> List[Any]:
+        '''
+        the pieces of str_content in order: a string is output as it is,
+        and a pair (sub hint, prefix) stands for the content of the sub hint
+        '''
         raise NotImplementedError()
 
     def __str__(self) -> str:
         return "\n" + self.str_content("") + "\n"
     
 class SkipHintTerm(ProofHintTerm):
+    __slots__ = ()
+    _instance : SkipHintTerm | None = None
+
+    def __new__(cls):
+        '''
+        single case design (the skip hint carries no data)
+        '''
+        if SkipHintTerm._instance is None:
+            skip = super().__new__(cls)
+            ProofHintTerm.__init__(skip, EMPTY_QVARLS, "skip hint", 0)
+            SkipHintTerm._instance = skip
+        return SkipHintTerm._instance
+
     def __init__(self):
-        super().__init__(QvarlsTerm(()), "skip hint")
+        '''
+        the term is set up in __new__
+        '''
+        pass
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        return isinstance(other, SkipHintTerm)
+    def _prog_consistent_impl(self, other: ProofHintTerm) -> bool:
+        return True
 
-    def str_content(self, prefix: str) -> str:
-        return prefix + "skip"
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + "skip"]
 
 class AbortHintTerm(ProofHintTerm):
+    __slots__ = ()
+    _instance : AbortHintTerm | None = None
+
+    def __new__(cls):
+        '''
+        single case design (the abort hint carries no data)
+        '''
+        if AbortHintTerm._instance is None:
+            abort = super().__new__(cls)
+            ProofHintTerm.__init__(abort, EMPTY_QVARLS, "abort hint", 0)
+            AbortHintTerm._instance = abort
+        return AbortHintTerm._instance
+
     def __init__(self):
-        super().__init__(QvarlsTerm(()), "abort hint")
+        '''
+        the term is set up in __new__
+        '''
+        pass
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        return isinstance(other, AbortHintTerm)
+    def _prog_consistent_impl(self, other: ProofHintTerm) -> bool:
+        return True
 
-    def str_content(self, prefix: str) -> str:
-        return prefix + "abort"
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + "abort"]
 
 class InitHintTerm(ProofHintTerm):
+    __slots__ = ("_qvarls",)
+
     def __init__(self, qvarls : QvarlsTerm):
         if not isinstance(qvarls, QvarlsTerm):
             raise RuntimeErrorWithLog("The term '" + str(qvarls) + "' is not a quantum variable list.")
 
 
-        super().__init__(qvarls, "initialization hint")
+        super().__init__(qvarls, "initialization hint", hash(qvarls))
         self._qvarls : QvarlsTerm = qvarls
 
     @property
     def qvarls(self) -> QvarlsTerm:
         return self._qvarls
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, InitHintTerm):
-            return self._qvarls == other._qvarls
-        else:
-            return False
+    def _prog_consistent_impl(self, other: InitHintTerm) -> bool:
+        return self._qvarls == other._qvarls
 
-    def str_content(self, prefix: str) -> str:
-        return prefix + str(self._qvarls) + " :=0"
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._qvarls) + " :=0"]
 
 class UnitaryHintTerm(ProofHintTerm):
+    __slots__ = ("_opt_pair",)
+
     def __init__(self, opt_pair : OptPairTerm):
         if not isinstance(opt_pair, OptPairTerm):
             raise RuntimeErrorWithLog("The term '" + str(opt_pair) + "' is not a operator variable pair.")
 
-        if not opt_pair.unitary_pair:
+        if not opt_pair._opt.unitary:
             raise RuntimeErrorWithLog("The operator variable pair '" + str(opt_pair) + "' is not an unitary pair.")
         
-        all_qvarls = opt_pair.qvarls
-        super().__init__(all_qvarls, "unitary hint")
+        all_qvarls = opt_pair._qvarls
+        super().__init__(all_qvarls, "unitary hint", hash(opt_pair))
         self._opt_pair : OptPairTerm = opt_pair
 
     @property
     def opt_pair(self) -> OptPairTerm:
         return self._opt_pair
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, UnitaryHintTerm):
-            return self._opt_pair == other._opt_pair
-        else:
-            return False
+    def _prog_consistent_impl(self, other: UnitaryHintTerm) -> bool:
+        return self._opt_pair == other._opt_pair
 
-    def str_content(self, prefix: str) -> str:
-        return prefix + str(self.opt_pair._qvarls) + " *= " + self.opt_pair.opt.name
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._opt_pair._qvarls) + " *= " + self._opt_pair._opt.name]
 
 class IfHintTerm(ProofHintTerm):
+    __slots__ = ("_opt_pair", "_P0", "_P1")
+
     def __init__(self, opt_pair : MeaPairTerm, P0 : ProofHintTerm, P1 : ProofHintTerm):
-        if not isinstance(opt_pair, MeaPairTerm):
-            raise RuntimeErrorWithLog("The term '" + str(opt_pair) + "' is not a measurement.")
-        
-        if not isinstance(P0, ProofHintTerm):
-            raise RuntimeErrorWithLog("The term '" + str(P0) + "' is not a proof hint.")
-        if not isinstance(P1, ProofHintTerm):
-            raise RuntimeErrorWithLog("The term '" + str(P1) + "' is not a proof hint.")
-            
+        _require_mea_pair(opt_pair)
+        _require_hint(P0)
+        _require_hint(P1)
         
-        all_qvarls = opt_pair.qvarls
-        all_qvarls = all_qvarls.join(P0.all_qvarls)
-        all_qvarls = all_qvarls.join(P1.all_qvarls)
-        super().__init__(all_qvarls, "if hint")
+        super().__init__(QvarlsTerm.union_many((opt_pair._qvarls, P0._all_qvarls, P1._all_qvarls)), "if hint",
+            hash((hash(opt_pair), P1._prog_hash, P0._prog_hash)))
         self._opt_pair : MeaPairTerm = opt_pair
         self._P0 : ProofHintTerm = P0
         self._P1 : ProofHintTerm = P1
@@ -160,37 +234,33 @@ class IfHintTerm(ProofHintTerm):
     def P1_val(self) -> ProofHintTerm:
         return self._P1
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, IfHintTerm):
-            return self._opt_pair == other._opt_pair\
-                and self.P1_val.prog_consistent(other.P1_val)\
-                and self.P0_val.prog_consistent(other.P0_val)
-        else:
-            return False
+    def _prog_consistent_impl(self, other: IfHintTerm) -> bool:
+        return self._opt_pair == other._opt_pair\
+            and self._P1.prog_consistent(other._P1)\
+            and self._P0.prog_consistent(other._P0)
 
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "if " + str(self._opt_pair) + " then\n"
-        r += self.P1_val.str_content(prefix + "\t") + "\n"
-        r += prefix + "else\n"
-        r += self.P0_val.str_content(prefix + "\t") + "\n"
-        r += prefix + "end"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        sub_prefix = child_prefix(prefix)
+        return [prefix + "if " + str(self._opt_pair) + " then\n",
+            (self._P1, sub_prefix),
+            "\n" + prefix + "else\n",
+            (self._P0, sub_prefix),
+            "\n" + prefix + "end"]
 
 class WhileHintTerm(ProofHintTerm):
+    __slots__ = ("_inv", "_opt_pair", "_P")
+
     def __init__(self, inv : QPreTerm, opt_pair : MeaPairTerm, P : ProofHintTerm):
-        if not isinstance(opt_pair, MeaPairTerm):
-            raise RuntimeErrorWithLog("The term '" + str(opt_pair) + "' is not a measurement.")
-      
+        _require_mea_pair(opt_pair)
+
         # check loop invariant
         if not isinstance(inv, QPreTerm):
             raise RuntimeErrorWithLog("The term '" + str(opt_pair) + "' is not a predicate, while a loop invariant is needed.")
 
-        if not isinstance(P, ProofHintTerm):
-            raise RuntimeErrorWithLog("The term '" + str(P) + "' is not a proof hint.")
+        _require_hint(P)
         
-        all_qvarls = opt_pair.qvarls
-        all_qvarls = all_qvarls.join(P.all_qvarls)
-        super().__init__(all_qvarls, "while hint")
+        super().__init__(QvarlsTerm.union_many((opt_pair._qvarls, P._all_qvarls)), "while hint",
+            hash((hash(opt_pair), P._prog_hash)))
         self._inv : QPreTerm = inv
         self._opt_pair : MeaPairTerm = opt_pair
         self._P : ProofHintTerm = P
@@ -207,179 +277,147 @@ class WhileHintTerm(ProofHintTerm):
     def P(self) -> ProofHintTerm:
         return self._P
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, WhileHintTerm):
-            return self._opt_pair == other._opt_pair\
-                and self.P.prog_consistent(other.P)
-        else:
-            return False
+    def _prog_consistent_impl(self, other: WhileHintTerm) -> bool:
+        return self._opt_pair == other._opt_pair\
+            and self._P.prog_consistent(other._P)
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "{ inv: " + self.inv.str_content() + "};\n"
-        r += prefix + "while " + str(self._opt_pair) + " do\n"
-        r += self.P.str_content(prefix + "\t") + "\n"
-        r += prefix + "end"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + "{ inv: " + self._inv.str_content() + "};\n" + prefix + "while " + str(self._opt_pair) + " do\n",
+            (self._P, child_prefix(prefix)),
+            "\n" + prefix + "end"]
 
 class NondetHintTerm(ProofHintTerm):
+    __slots__ = ("_proof_hints",)
+
     def __init__(self, proof_hints : Tuple[ProofHintTerm, ...]):
         if not isinstance(proof_hints, tuple):
             raise ValueError()
         
-        all_qvarls = QvarlsTerm(())
+        qvarls_ls : List[QvarlsTerm] = []
         for item in proof_hints:
-            if not isinstance(item, ProofHintTerm):
-                raise RuntimeErrorWithLog("The term '" + str(item) + "' is not a proof hint.")
-            all_qvarls = all_qvarls.join(item.all_qvarls)
+            _require_hint(item)
+            qvarls_ls.append(item._all_qvarls)
         
-        super().__init__(all_qvarls, "nondeterministic hint")
+        super().__init__(QvarlsTerm.union_many(qvarls_ls), "nondeterministic hint",
+            hash(tuple(item._prog_hash for item in proof_hints)))
         self._proof_hints : Tuple[ProofHintTerm,...] = proof_hints
     
     def get_proof_hint(self, i : int) -> ProofHintTerm:
         return self._proof_hints[i]
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, NondetHintTerm):
-            if len(self._proof_hints) != len(other._proof_hints):
-                return False
-            for i in range(len(self._proof_hints)):
-                if not self.get_proof_hint(i).prog_consistent(other.get_proof_hint(i)):
-                    return False
-            return True
-        else:
+    def _prog_consistent_impl(self, other: NondetHintTerm) -> bool:
+        if len(self._proof_hints) != len(other._proof_hints):
             return False
+        for hint_self, hint_other in zip(self._proof_hints, other._proof_hints):
+            if not hint_self.prog_consistent(hint_other):
+                return False
+        return True
 
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "(\n"
-        r += self.get_proof_hint(0).str_content(prefix + "\t") + "\n"
-        for i in range(1, len(self._proof_hints)):
-            r += prefix + "#\n"
-            r += self.get_proof_hint(i).str_content(prefix + "\t") + "\n"
-        r += prefix + ")"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return _list_pieces(self._proof_hints, prefix, "#")
 
 class QPreHintTerm(ProofHintTerm):
+    __slots__ = ("_qpre",)
+
     def __init__(self, qpre : QPreTerm):
         if not isinstance(qpre, QPreTerm):
             raise ValueError()
 
-        super().__init__(qpre.all_qvarls,"predicate hint")
+        super().__init__(qpre.all_qvarls,"predicate hint", 0)
         self._qpre : QPreTerm = qpre
 
     @property
     def qpre(self) -> QPreTerm:
         return self._qpre
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
+    def _prog_consistent_impl(self, other: ProofHintTerm) -> bool:
         '''
         not meant for qpre
         '''
         raise Exception()
     
-    def str_content(self, prefix: str) -> str:
-        return prefix + str(self.qpre)
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._qpre)]
 
 
 class UnionHintTerm(ProofHintTerm):
+    __slots__ = ("_proof_hints",)
+
     def __init__(self, proof_hints : Tuple[ProofHintTerm,...]):
         if not isinstance(proof_hints, tuple):
             raise ValueError()
-        all_qvarls = QvarlsTerm(())
-        for item in proof_hints:
-            if not isinstance(item, ProofHintTerm):
-                raise RuntimeErrorWithLog("The term '" + str(item) + "' is not a proof hint.")
-            all_qvarls = all_qvarls.join(item.all_qvarls)
-        
-        # check whether the program of all proofs are the same
+        # check the items, collect the variables and check whether the program of all proofs are the same in one pass
         example_proof_hint = proof_hints[0]
-        for i in range(1, len(proof_hints)):
-            item = proof_hints[i]
-            if not example_proof_hint.prog_consistent(item):
+        qvarls_ls : List[QvarlsTerm] = []
+        for item in proof_hints:
+            _require_hint(item)
+            qvarls_ls.append(item._all_qvarls)
+            if item is not example_proof_hint and not example_proof_hint.prog_consistent(item):
                 raise RuntimeErrorWithLog(
                     "The (Union) rule requires that all the proofs are about the same program, but proof '" +\
-                        str(proof_hints[0]) + "' and proof '" + str(proof_hints[i]) + "' are not."
+                        str(example_proof_hint) + "' and proof '" + str(item) + "' are not."
                 )
 
-
-        super().__init__(all_qvarls, "union hint")
+        # all the proofs are about the same program, which the first one represents
+        super().__init__(QvarlsTerm.union_many(qvarls_ls), "union hint", example_proof_hint._prog_hash)
         self._proof_hints : Tuple[ProofHintTerm,...] = proof_hints
     
     def get_proof_hint(self, i : int) -> ProofHintTerm:
         return self._proof_hints[i]
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, UnionHintTerm):
-            return self.get_proof_hint(0) == other.get_proof_hint(0)
-        else:
-            return False
+    def _prog_consistent_impl(self, other: UnionHintTerm) -> bool:
+        return self._proof_hints[0] == other._proof_hints[0]
 
-    def str_content(self, prefix: str) -> str:
-        r = prefix + "(\n"
-        r += self.get_proof_hint(0).str_content(prefix + "\t") + "\n"
-        for i in range(1, len(self._proof_hints)):
-            r += prefix + ",\n"
-            r += self.get_proof_hint(i).str_content(prefix + "\t") + "\n"
-        r += prefix + ")"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return _list_pieces(self._proof_hints, prefix, ",")
 
 class ProofSeqHintTerm(ProofHintTerm):
+    __slots__ = ("_proof_hints", "_prog_hints")
+
     def __init__(self, proof_hints : Tuple[ProofHintTerm,...]):
         if not isinstance(proof_hints, tuple):
             raise ValueError()
         
-        all_qvarls = QvarlsTerm(())
+        # check the items, collect the variables and flatten the sequential composition in one pass
+        qvarls_ls : List[QvarlsTerm] = []
+        flattened : List[ProofHintTerm] = []
+        # the hints without the qpredicates, which do not belong to the program (for prog_consistent)
+        prog_hints : List[ProofHintTerm] = []
         for item in proof_hints:
-            if not isinstance(item, ProofHintTerm):
-                raise RuntimeErrorWithLog("The term '" + str(item) + "' is not a proof hint.")
-            # the individual subprogram can be "None" here
-            all_qvarls = all_qvarls.join(item.all_qvarls)
-        
-        super().__init__(all_qvarls, "sequential hint")
-        # flatten the sequential composition
-        flattened = ()
-        for item in proof_hints:
-            if isinstance(item, ProofSeqHintTerm):
-                flattened = flattened + item._proof_hints
+            _require_hint(item)
+            qvarls_ls.append(item._all_qvarls)
+            if type(item) is ProofSeqHintTerm:
+                flattened.extend(item._proof_hints)
+                prog_hints.extend(item._prog_hints)
             else:
-                flattened = flattened + (item,)
-        self._proof_hints : Tuple[ProofHintTerm,...] = flattened
+                flattened.append(item)
+                if type(item) is not QPreHintTerm:
+                    prog_hints.append(item)
+        
+        super().__init__(QvarlsTerm.union_many(qvarls_ls), "sequential hint",
+            hash(tuple(item._prog_hash for item in prog_hints)))
+        self._proof_hints : Tuple[ProofHintTerm,...] = tuple(flattened)
+        self._prog_hints : Tuple[ProofHintTerm,...] = tuple(prog_hints)
 
     def get_proof_hint(self, i : int) -> ProofHintTerm:
         return self._proof_hints[i]
 
-    def prog_consistent(self, other: ProofHintTerm) -> bool:
-        if isinstance(other, ProofSeqHintTerm):
-            # get the list without qpredicate
-            ls_self : List[ProofHintTerm] = []
-            for i in range(len(self._proof_hints)):
-                temp = self.get_proof_hint(i)
-                if not isinstance(temp, QPreHintTerm):
-                    ls_self.append(temp)
-            ls_other : List[ProofHintTerm] = []
-            for i in range(len(other._proof_hints)):
-                temp = other.get_proof_hint(i)
-                if not isinstance(temp, QPreHintTerm):
-                    ls_other.append(temp)
-            if len(ls_self) != len(ls_other):
-                return False
-            # begin comparing
-            for i in range(len(ls_self)):
-                if not ls_self[i].prog_consistent(ls_other[i]):
-                    return False
-            return True
-        else:
+    def _prog_consistent_impl(self, other: ProofSeqHintTerm) -> bool:
+        if len(self._prog_hints) != len(other._prog_hints):
             return False
+        for hint_self, hint_other in zip(self._prog_hints, other._prog_hints):
+            if not hint_self.prog_consistent(hint_other):
+                return False
+        return True
 
-    def str_content(self, prefix: str) -> str:
-        if len(self._proof_hints) == 1:
-            return self.get_proof_hint(0).str_content(prefix)
-        elif len(self._proof_hints) > 1:
-            r = ""
-            for i in range(len(self._proof_hints)-1):
-                r += self.get_proof_hint(i).str_content(prefix) + ";\n"
-            r += self.get_proof_hint(len(self._proof_hints)-1).str_content(prefix)
-            return r
-        else:
+    def content_pieces(self, prefix : str) -> List[Any]:
+        if len(self._proof_hints) == 0:
             raise Exception()
+        pieces : List[Any] = []
+        for i, item in enumerate(self._proof_hints):
+            if i > 0:
+                pieces.append(";\n")
+            pieces.append((item, prefix))
+        return pieces
 
 
@@ -63,139 +63,163 @@ def wp_calculus(hint : ProofHintTerm, post : QPreTerm) -> ProofSttTerm:
     calculate the weakest precondition, of a program given by proof_hint with respect to the post condition
     return a proof statement for this
     '''
-    scope = VarScope.get_cur_scope()
+    _wp_report(VarScope.get_cur_scope(), hint, post)
+
+    # the hint classes are leaf classes, so a single lookup on the exact type selects the rule
+    rule = _WP_DISPATCH.get(type(hint))
+    if rule is None:
+        raise Exception()
+    return rule(hint, post)
 
+def _wp_report(scope : VarScope, hint : ProofHintTerm, post : QPreTerm) -> None:
     scope.report("wp calculus : " + str(hint.label))
     scope.report("{ ? }")
     scope.report(str(hint))
     scope.report(str(post) + "\n")
-    
-    if isinstance(hint, SkipHintTerm):
-        return SkipProofTerm(post, post)
-        
-    elif isinstance(hint, AbortHintTerm):
-        pre = qpre_I(post.all_qvarls)
-        return AbortProofTerm(pre, post)
 
-    elif isinstance(hint, InitHintTerm):
-        pre = qpre_init(post, hint.qvarls)
-        return InitProofTerm(pre, post, hint._qvarls)
+def _wp_skip(hint : SkipHintTerm, post : QPreTerm) -> ProofSttTerm:
+    return SkipProofTerm(post, post)
 
-    elif isinstance(hint, UnitaryHintTerm):
-        pre = qpre_contract(post, hint.opt_pair.dagger())
-        return UnitaryProofTerm(pre, post, hint._opt_pair)
-    
-    elif isinstance(hint, IfHintTerm):
-        if len(post.opt_pairs) == 1:            
-
-            P0 = wp_calculus(hint.P0_val, post)
-            P1 = wp_calculus(hint.P1_val, post)
-
-            pre = qpre_mea_proj_sum(P0.pre, P1.pre, hint.opt_pair)
-            return IfProofTerm(pre, post, hint._opt_pair, P0, P1)
-
-        else:
-            # break the set using (Union) rule
-            proof_ls : List[ProofSttTerm]= []
-            union_pre = QPreTerm(())
-            for pair in post.opt_pairs:
-                this_post = QPreTerm((pair,))
-
-                P0 = wp_calculus(hint.P0_val, this_post)
-                P1 = wp_calculus(hint.P1_val, this_post)
-                this_pre = qpre_mea_proj_sum(P0.pre, P1.pre, hint.opt_pair)
-                union_pre = union_pre.union(this_pre)
-                proof_ls.append(IfProofTerm(this_pre, this_post, hint._opt_pair, P0, P1))
-            
-            return UnionProofTerm(union_pre, post, tuple(proof_ls))
+def _wp_abort(hint : AbortHintTerm, post : QPreTerm) -> ProofSttTerm:
+    pre = qpre_I(post.all_qvarls)
+    return AbortProofTerm(pre, post)
+
+def _wp_init(hint : InitHintTerm, post : QPreTerm) -> ProofSttTerm:
+    pre = qpre_init(post, hint.qvarls)
+    return InitProofTerm(pre, post, hint._qvarls)
+
+def _wp_unitary(hint : UnitaryHintTerm, post : QPreTerm) -> ProofSttTerm:
+    pre = qpre_contract(post, hint.opt_pair.dagger())
+    return UnitaryProofTerm(pre, post, hint._opt_pair)
+
+def _wp_if(hint : IfHintTerm, post : QPreTerm) -> ProofSttTerm:
+    if len(post.opt_pairs) == 1:            
+
+        P0 = wp_calculus(hint.P0_val, post)
+        P1 = wp_calculus(hint.P1_val, post)
+
+        pre = qpre_mea_proj_sum(P0.pre, P1.pre, hint.opt_pair)
+        return IfProofTerm(pre, post, hint._opt_pair, P0, P1)
+
+    else:
+        # break the set using (Union) rule
+        proof_ls : List[ProofSttTerm]= []
+        union_pre = QPreTerm(())
+        for pair in post.opt_pairs:
+            this_post = QPreTerm((pair,))
+
+            P0 = wp_calculus(hint.P0_val, this_post)
+            P1 = wp_calculus(hint.P1_val, this_post)
+            this_pre = qpre_mea_proj_sum(P0.pre, P1.pre, hint.opt_pair)
+            union_pre = union_pre.union(this_pre)
+            proof_ls.append(IfProofTerm(this_pre, this_post, hint._opt_pair, P0, P1))
         
-    elif isinstance(hint, WhileHintTerm):
+        return UnionProofTerm(union_pre, post, tuple(proof_ls))
 
-        if len(post.opt_pairs) == 1:            
-            proposed_pre = qpre_mea_proj_sum(hint.inv, post, hint.opt_pair)
+def _wp_while(hint : WhileHintTerm, post : QPreTerm) -> ProofSttTerm:
+    if len(post.opt_pairs) == 1:            
+        proposed_pre = qpre_mea_proj_sum(hint.inv, post, hint.opt_pair)
+        P = wp_calculus(hint.P, proposed_pre)
+        try:
+            QPreTerm.sqsubseteq(hint.inv, P.pre)
+        except:
+            raise RuntimeErrorWithLog("The predicate '" + str(hint._inv) + "' is not a valid loop invariant.")  
+
+        return WhileProofTerm(proposed_pre, post, hint._inv, hint._opt_pair, P)
+    else:
+        # break the set using (Union) rule
+        proof_ls : List[ProofSttTerm]= []
+        union_pre = QPreTerm(())
+        for pair in post.opt_pairs:
+            this_post = QPreTerm((pair,))
+
+            proposed_pre = qpre_mea_proj_sum(hint.inv, this_post, hint.opt_pair)
             P = wp_calculus(hint.P, proposed_pre)
             try:
                 QPreTerm.sqsubseteq(hint.inv, P.pre)
             except:
                 raise RuntimeErrorWithLog("The predicate '" + str(hint._inv) + "' is not a valid loop invariant.")  
 
-            return WhileProofTerm(proposed_pre, post, hint._inv, hint._opt_pair, P)
-        else:
-            # break the set using (Union) rule
-            proof_ls : List[ProofSttTerm]= []
-            union_pre = QPreTerm(())
-            for pair in post.opt_pairs:
-                this_post = QPreTerm((pair,))
-
-                proposed_pre = qpre_mea_proj_sum(hint.inv, this_post, hint.opt_pair)
-                P = wp_calculus(hint.P, proposed_pre)
-                try:
-                    QPreTerm.sqsubseteq(hint.inv, P.pre)
-                except:
-                    raise RuntimeErrorWithLog("The predicate '" + str(hint._inv) + "' is not a valid loop invariant.")  
-
-                union_pre = union_pre.union(proposed_pre)
-                proof_ls.append(WhileProofTerm(proposed_pre, this_post, hint._inv, hint._opt_pair, P))
-            
-            return UnionProofTerm(union_pre, post, tuple(proof_ls))
-
-    elif isinstance(hint, NondetHintTerm):
-        proof_stts = []
-        pre = QPreTerm(())
-        for item in hint._proof_hints:
-            new_proof_stt = wp_calculus(item, post)
-            proof_stts.append(new_proof_stt)
-            pre = pre.union(new_proof_stt.pre)
+            union_pre = union_pre.union(proposed_pre)
+            proof_ls.append(WhileProofTerm(proposed_pre, this_post, hint._inv, hint._opt_pair, P))
         
-        return NondetProofTerm(pre, post, tuple(proof_stts))
+        return UnionProofTerm(union_pre, post, tuple(proof_ls))
+
+def _wp_nondet(hint : NondetHintTerm, post : QPreTerm) -> ProofSttTerm:
+    proof_stts = []
+    pre = QPreTerm(())
+    for item in hint._proof_hints:
+        new_proof_stt = wp_calculus(item, post)
+        proof_stts.append(new_proof_stt)
+        pre = pre.union(new_proof_stt.pre)
     
-    elif isinstance(hint, QPreHintTerm):
-        try:
-            QPreTerm.sqsubseteq(hint._qpre, post)
-        except RuntimeErrorWithLog:
-            raise RuntimeErrorWithLog("The condition hint '" + str(post) + "' does not hold.")
-        
-        return QPreProofTerm(hint._qpre, post, hint._qpre)
+    return NondetProofTerm(pre, post, tuple(proof_stts))
 
-    elif isinstance(hint, UnionHintTerm):
-        proof_stts = []
-        pre_cal = QPreTerm(())
-        post_cal = QPreTerm(())
-        for item in hint._proof_hints:
-            try:
-                # different tactics for subproofs and proof hints
-                if isinstance(item, ProofSeqHintTerm):
-                    subhint = item.get_proof_hint(len(item._proof_hints)-1)
-                    if isinstance(subhint, QPreHintTerm):
-                        item_post = subhint.qpre
-                    else:
-                        raise RuntimeErrorWithLog("The postcondition of proof hint '" + str(item) + "' cannot be automatically deduced.")
-
-                    new_proof_stt = wp_calculus(item, item_post)
-                    proof_stts.append(new_proof_stt)
-                    post_cal = post_cal.union(item_post)
-                    pre_cal = pre_cal.union(new_proof_stt.pre)
-
-            except RuntimeErrorWithLog:
-                raise RuntimeErrorWithLog("The proof '" + str(item) + "' in the union proof does not hold.")
-        
+def _wp_qpre(hint : QPreHintTerm, post : QPreTerm) -> ProofSttTerm:
+    try:
+        QPreTerm.sqsubseteq(hint._qpre, post)
+    except RuntimeErrorWithLog:
+        raise RuntimeErrorWithLog("The condition hint '" + str(post) + "' does not hold.")
+    
+    return QPreProofTerm(hint._qpre, post, hint._qpre)
+
+def _wp_union(hint : UnionHintTerm, post : QPreTerm) -> ProofSttTerm:
+    proof_stts = []
+    pre_cal = QPreTerm(())
+    post_cal = QPreTerm(())
+    for item in hint._proof_hints:
         try:
-            QPreTerm.sqsubseteq(post_cal, post)
-        except RuntimeErrorWithLog:
-            raise RuntimeErrorWithLog("The postcondition and the (Union) proof hint do not fit.")
+            # different tactics for subproofs and proof hints
+            if type(item) is ProofSeqHintTerm:
+                subhint = item.get_proof_hint(len(item._proof_hints)-1)
+                if type(subhint) is QPreHintTerm:
+                    item_post = subhint.qpre
+                else:
+                    raise RuntimeErrorWithLog("The postcondition of proof hint '" + str(item) + "' cannot be automatically deduced.")
+
+                new_proof_stt = wp_calculus(item, item_post)
+                proof_stts.append(new_proof_stt)
+                post_cal = post_cal.union(item_post)
+                pre_cal = pre_cal.union(new_proof_stt.pre)
 
-        return UnionProofTerm(pre_cal, post_cal, tuple(proof_stts))
+        except RuntimeErrorWithLog:
+            raise RuntimeErrorWithLog("The proof '" + str(item) + "' in the union proof does not hold.")
     
-    elif isinstance(hint, ProofSeqHintTerm):
-        # backward transformation
-        proof_stts : List[ProofSttTerm] = []
-        cur_post = post
-        for i in range(len(hint._proof_hints)-1, -1, -1):
-            item = hint._proof_hints[i]
-            proof_stts.insert(0, wp_calculus(item, cur_post))
-            cur_post = proof_stts[0].pre
-        
-        return ProofSeqTerm(cur_post, post, tuple(proof_stts))
+    try:
+        QPreTerm.sqsubseteq(post_cal, post)
+    except RuntimeErrorWithLog:
+        raise RuntimeErrorWithLog("The postcondition and the (Union) proof hint do not fit.")
+
+    return UnionProofTerm(pre_cal, post_cal, tuple(proof_stts))
+
+def _wp_seq(hint : ProofSeqHintTerm, post : QPreTerm) -> ProofSttTerm:
+    # backward transformation
+    # (the items are never sequences, so they are dispatched here directly, the same as wp_calculus does)
+    scope = VarScope.get_cur_scope()
+    proof_stts : List[ProofSttTerm] = []
+    cur_post = post
+    for i in range(len(hint._proof_hints)-1, -1, -1):
+        item = hint._proof_hints[i]
+        _wp_report(scope, item, cur_post)
+        rule = _WP_DISPATCH.get(type(item))
+        if rule is None:
+            raise Exception()
+        proof_stts.append(rule(item, cur_post))
+        cur_post = proof_stts[-1].pre
     
-    else:
-        raise Exception()
+    # the statements were collected backward
+    proof_stts.reverse()
+    return ProofSeqTerm(cur_post, post, tuple(proof_stts))
+
+_WP_DISPATCH = {
+    SkipHintTerm : _wp_skip,
+    AbortHintTerm : _wp_abort,
+    InitHintTerm : _wp_init,
+    UnitaryHintTerm : _wp_unitary,
+    IfHintTerm : _wp_if,
+    WhileHintTerm : _wp_while,
+    NondetHintTerm : _wp_nondet,
+    QPreHintTerm : _wp_qpre,
+    UnionHintTerm : _wp_union,
+    ProofSeqHintTerm : _wp_seq,
+}
@@ -30,6 +30,7 @@ from .opt_pair_term import OptPairTerm, MeaPairTerm
 from .qpre_term import QPreTerm
 from .prog_term import *
 from .proof_hint_term import ProofHintTerm
+from .term_helper import child_prefix, render_pieces
 
 # proof statements
 
@@ -37,10 +38,13 @@ class ProofSttTerm(VVar):
     def __init__(self, pre : QPreTerm, post : QPreTerm):
         super().__init__()
 
-        if not isinstance(pre, QPreTerm):
-            raise RuntimeErrorWithLog("The term '" + str(pre) + "' is not a quantum predicate.")
-        if not isinstance(post, QPreTerm):
-            raise RuntimeErrorWithLog("The term '" + str(post) + "' is not a quantum predicate.")
+        # the proof statements are only built by wp_calculus from checked terms
+        # (internal usage errors, stripped under 'python -O')
+        if __debug__:
+            if not isinstance(pre, QPreTerm):
+                raise RuntimeErrorWithLog("The term '" + str(pre) + "' is not a quantum predicate.")
+            if not isinstance(post, QPreTerm):
+                raise RuntimeErrorWithLog("The term '" + str(post) + "' is not a quantum predicate.")
 
         all_qvarls = pre.all_qvarls
         all_qvarls = all_qvarls.join(post.all_qvarls)
@@ -68,6 +72,13 @@ class ProofSttTerm(VVar):
         raise NotImplementedError()
     
     def str_content(self, prefix : str) -> str:
+        return render_pieces(self, prefix)
+
+    def content_pieces(self, prefix : str) -> List[Any]:
+        '''
+        the pieces of str_content in order: a string is output as it is,
+        and a pair (sub proof, prefix) stands for the content of the sub proof
+        '''
         raise NotImplementedError()
 
     def __str__(self) -> str:
@@ -85,26 +96,23 @@ class SkipProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm):
         super().__init__(pre, post)
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + "skip"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._pre) + ";\n" + prefix + "skip"]
     
 
 class AbortProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm):
         super().__init__(pre, post)
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + "abort"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._pre) + ";\n" + prefix + "abort"]
     
 
 class InitProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, qvarls : QvarlsTerm):
-        if not isinstance(qvarls, QvarlsTerm):
-            raise ValueError()
+        if __debug__:
+            if not isinstance(qvarls, QvarlsTerm):
+                raise ValueError()
 
         super().__init__(pre, post)
         self._all_qvarls = self._all_qvarls.join(qvarls)
@@ -114,15 +122,14 @@ class InitProofTerm(ProofSttTerm):
     def qvarls(self) -> QvarlsTerm:
         return self._qvarls
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + str(self.qvarls) + " :=0"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._pre) + ";\n" + prefix + str(self._qvarls) + " :=0"]
         
 class UnitaryProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, opt_pair : OptPairTerm):
-        if not isinstance(opt_pair, OptPairTerm):
-            raise ValueError()
+        if __debug__:
+            if not isinstance(opt_pair, OptPairTerm):
+                raise ValueError()
 
         super().__init__(pre, post)
         self._all_qvarls = self._all_qvarls.join(opt_pair.qvarls)
@@ -132,20 +139,19 @@ class UnitaryProofTerm(ProofSttTerm):
     def opt_pair(self) -> OptPairTerm:
         return self._opt_pair
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + str(self.opt_pair.qvarls) + " *= " + self.opt_pair.opt.name
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._pre) + ";\n" + prefix + str(self._opt_pair._qvarls) + " *= " + self._opt_pair._opt.name]
         
 class IfProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, opt_pair : MeaPairTerm, 
                 P0 : ProofSttTerm, P1 : ProofSttTerm):        
-        if not isinstance(opt_pair, MeaPairTerm):
-            raise ValueError()
-        if not isinstance(P0, ProofSttTerm):
-            raise RuntimeErrorWithLog("The term '" + str(P0) + "' is not a proof statement.")
-        if not isinstance(P1, ProofSttTerm):
-            raise RuntimeErrorWithLog("The term '" + str(P1) + "' is not a proof statement.")
+        if __debug__:
+            if not isinstance(opt_pair, MeaPairTerm):
+                raise ValueError()
+            if not isinstance(P0, ProofSttTerm):
+                raise RuntimeErrorWithLog("The term '" + str(P0) + "' is not a proof statement.")
+            if not isinstance(P1, ProofSttTerm):
+                raise RuntimeErrorWithLog("The term '" + str(P1) + "' is not a proof statement.")
 
         super().__init__(pre, post)
         self._all_qvarls = self._all_qvarls.join(opt_pair.qvarls)
@@ -168,23 +174,23 @@ class IfProofTerm(ProofSttTerm):
         return self._P1
     
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + "if " + str(self.opt_pair) + " then\n"
-        r += self.P1.str_content(prefix + "\t") + "\n"
-        r += prefix + "else\n"
-        r += self.P0.str_content(prefix + "\t") + "\n"
-        r += prefix + "end"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        sub_prefix = child_prefix(prefix)
+        return [prefix + str(self._pre) + ";\n" + prefix + "if " + str(self._opt_pair) + " then\n",
+            (self._P1, sub_prefix),
+            "\n" + prefix + "else\n",
+            (self._P0, sub_prefix),
+            "\n" + prefix + "end"]
     
     
 class WhileProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, inv : QPreTerm, 
                 opt_pair : MeaPairTerm, P : ProofSttTerm):        
-        if not isinstance(inv, QPreTerm) or not isinstance(opt_pair, MeaPairTerm):
-            raise ValueError()
-        if not isinstance(P, ProofSttTerm):
-            raise RuntimeErrorWithLog("The term '" + str(P) + "' is not a proof statement.")
+        if __debug__:
+            if not isinstance(inv, QPreTerm) or not isinstance(opt_pair, MeaPairTerm):
+                raise ValueError()
+            if not isinstance(P, ProofSttTerm):
+                raise RuntimeErrorWithLog("The term '" + str(P) + "' is not a proof statement.")
 
         super().__init__(pre, post)
         self._all_qvarls = self._all_qvarls.join(inv.all_qvarls)
@@ -206,18 +212,17 @@ class WhileProofTerm(ProofSttTerm):
     def P(self) -> ProofSttTerm:
         return self._P
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + "{ inv: " + self.inv.str_content() + " };\n"
-        r += prefix + "while " + str(self.opt_pair) + " do\n"
-        r += self.P.str_content(prefix + "\t") + "\n"
-        r += prefix + "end"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._pre) + ";\n" + prefix + "{ inv: " + self._inv.str_content() + " };\n" 
+                + prefix + "while " + str(self._opt_pair) + " do\n",
+            (self._P, child_prefix(prefix)),
+            "\n" + prefix + "end"]
     
 class NondetProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, proof_ls : Tuple[ProofSttTerm,...]):        
-        if not isinstance(proof_ls, tuple):
-            raise ValueError()
+        if __debug__:
+            if not isinstance(proof_ls, tuple):
+                raise ValueError()
         
         super().__init__(pre, post)
         for item in proof_ls:
@@ -227,21 +232,23 @@ class NondetProofTerm(ProofSttTerm):
     def get_proof(self, i : int) -> ProofSttTerm:
         return self._proof_ls[i]
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + "(\n"
-        r += self.get_proof(0).str_content(prefix + "\t") + "\n"
-        for i in range(1, len(self._proof_ls)):
-            r += prefix + "#\n"
-            r += self.get_proof(i).str_content(prefix + "\t") + "\n"
-        r += prefix + ")"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        sub_prefix = child_prefix(prefix)
+        sep = "\n" + prefix + "#\n"
+        pieces : List[Any] = [prefix + str(self._pre) + ";\n" + prefix + "(\n"]
+        for i, item in enumerate(self._proof_ls):
+            if i > 0:
+                pieces.append(sep)
+            pieces.append((item, sub_prefix))
+        pieces.append("\n" + prefix + ")")
+        return pieces
 
     
 class QPreProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, qpre : QPreTerm):
-        if not isinstance(qpre, QPreTerm):
-            raise ValueError()
+        if __debug__:
+            if not isinstance(qpre, QPreTerm):
+                raise ValueError()
         
         super().__init__(pre, post)
         self._all_qvarls = self._all_qvarls.join(qpre.all_qvarls)
@@ -251,13 +258,14 @@ class QPreProofTerm(ProofSttTerm):
     def qpre(self) -> QPreTerm:
         return self._qpre
     
-    def str_content(self, prefix: str) -> str:
-        return prefix + str(self.qpre)
+    def content_pieces(self, prefix : str) -> List[Any]:
+        return [prefix + str(self._qpre)]
     
 class UnionProofTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, proof_ls : Tuple[ProofSttTerm,...]):
-        if not isinstance(proof_ls, tuple):
-            raise ValueError()
+        if __debug__:
+            if not isinstance(proof_ls, tuple):
+                raise ValueError()
 
         super().__init__(pre, post)
         for item in proof_ls:
@@ -267,23 +275,23 @@ class UnionProofTerm(ProofSttTerm):
     def get_proof(self, i : int) -> ProofSttTerm:
         return self._proof_ls[i]
     
-    def str_content(self, prefix: str) -> str:
-        r = prefix + str(self.pre) + ";\n"
-        r += prefix + "(\n"
-        r += self.get_proof(0).str_content(prefix + "\t") + ";\n"
-        r += prefix + "\t" + str(self.get_proof(0).post) + "\n"
-        for i in range(1, len(self._proof_ls)):
-            r += prefix + ",\n"
-            r += self.get_proof(i).str_content(prefix + "\t") + ";\n"
-            r += prefix + "\t" + str(self.get_proof(i).post) + "\n"
-        r += prefix + ")"
-        return r
+    def content_pieces(self, prefix : str) -> List[Any]:
+        sub_prefix = child_prefix(prefix)
+        pieces : List[Any] = [prefix + str(self._pre) + ";\n" + prefix + "(\n"]
+        for i, item in enumerate(self._proof_ls):
+            if i > 0:
+                pieces.append(prefix + ",\n")
+            pieces.append((item, sub_prefix))
+            pieces.append(";\n" + sub_prefix + str(item._post) + "\n")
+        pieces.append(prefix + ")")
+        return pieces
     
 
 class ProofSeqTerm(ProofSttTerm):
     def __init__(self, pre : QPreTerm, post : QPreTerm, proof_ls : Tuple[ProofSttTerm,...]):        
-        if not isinstance(proof_ls, tuple):
-            raise ValueError()
+        if __debug__:
+            if not isinstance(proof_ls, tuple):
+                raise ValueError()
         
         super().__init__(pre, post)
         for item in proof_ls:
@@ -293,17 +301,15 @@ class ProofSeqTerm(ProofSttTerm):
     def get_proof(self, i : int) -> ProofSttTerm:
         return self._proof_ls[i]
 
-    def str_content(self, prefix: str) -> str:
-        if len(self._proof_ls) == 1:
-            return self.get_proof(0).str_content(prefix)
-        elif len(self._proof_ls) > 1:
-            r = ""
-            for i in range(len(self._proof_ls)-1):
-                r += self.get_proof(i).str_content(prefix) + ";\n\n"
-            r += self.get_proof(len(self._proof_ls)-1).str_content(prefix)
-            return r
-        else:
+    def content_pieces(self, prefix : str) -> List[Any]:
+        if len(self._proof_ls) == 0:
             raise Exception()
+        pieces : List[Any] = []
+        for i, item in enumerate(self._proof_ls):
+            if i > 0:
+                pieces.append(";\n\n")
+            pieces.append((item, prefix))
+        return pieces
         
 
 class ProofDefinedTerm(VVar):
@@ -60,6 +60,8 @@ class QPreTerm(VVar):
                 unique_pairs.append(pair)
         
         self._opt_pairs : Tuple[OptPairTerm,...] = tuple(unique_pairs)
+        # computed on the first request
+        self._all_qvarls : QvarlsTerm | None = None
     
     @property
     def opt_pairs(self) -> Tuple[OptPairTerm,...]:
@@ -76,10 +78,9 @@ class QPreTerm(VVar):
         '''
         return all the quantum variables used in the predicate
         '''
-        result = QvarlsTerm(())
-        for i in range(len(self)):
-            result = result.join(self.get_pair(i).qvarls)
-        return result
+        if self._all_qvarls is None:
+            self._all_qvarls = QvarlsTerm.union_many(pair._qvarls for pair in self._opt_pairs)
+        return self._all_qvarls
     
     def str_content(self) -> str:
         '''
@@ -88,10 +89,7 @@ class QPreTerm(VVar):
         if len(self) == 0:
             return ""
         else:
-            r = str(self._opt_pairs[0])
-            for i in range(1, len(self)):
-                r += " " + str(self._opt_pairs[i])
-            return r
+            return " ".join(str(pair) for pair in self._opt_pairs)
 
     def __str__(self) -> str:
         if len(self) == 0:
@@ -106,10 +104,7 @@ class QPreTerm(VVar):
         return QPreTerm(self._opt_pairs + other._opt_pairs)
 
     def qvar_subsitute(self, correspondence : Dict[str, str]) -> QPreTerm:
-        new_pairs = []
-        for i in range(len(self)):
-            new_pairs.append(self.get_pair(i).qvar_substitute(correspondence))
-        return QPreTerm(tuple(new_pairs))
+        return QPreTerm(tuple(pair.qvar_substitute(correspondence) for pair in self._opt_pairs))
 
     @staticmethod
     def sqsubseteq(qpreA : QPreTerm, qpreB : QPreTerm) -> None:
@@ -210,8 +205,8 @@ def qpre_contract(qpre : QPreTerm, M : OptPairTerm) -> QPreTerm:
     if not isinstance(qpre, QPreTerm) or not isinstance(M, OptPairTerm):
         raise ValueError()
     pairs = []
-    for i in range(len(qpre)):
-        new_pair = opt_pair_term.hermitian_contract(qpre.get_pair(i), M)
+    for pair in qpre._opt_pairs:
+        new_pair = opt_pair_term.hermitian_contract(pair, M)
         new_name = scope.append(new_pair.opt)
         new_pair = OptPairTerm(scope[new_name], new_pair.qvarls)
         pairs.append(new_pair)
@@ -224,8 +219,8 @@ def qpre_init(qpre : QPreTerm, qvarls : QvarlsTerm) -> QPreTerm:
     if not isinstance(qpre, QPreTerm) or not isinstance(qvarls, QvarlsTerm):
         raise ValueError()
     pairs = []
-    for i in range(len(qpre)):
-        new_pair = opt_pair_term.hermitian_init(qpre.get_pair(i), qvarls)
+    for pair in qpre._opt_pairs:
+        new_pair = opt_pair_term.hermitian_init(pair, qvarls)
         new_name = scope.append(new_pair.opt)
         new_pair = OptPairTerm(scope[new_name], new_pair.qvarls)
         pairs.append(new_pair)
@@ -247,12 +242,12 @@ def qpre_mea_proj_sum(qpre0 : QPreTerm, qpre1 : QPreTerm,
     M0 = M.mea0
     M1 = M.mea1
     pairs = []
-    for i in range(len(qpre0)):
-        for j in range(len(qpre1)):
+    for pair0 in qpre0._opt_pairs:
+        for pair1 in qpre1._opt_pairs:
             new_pair = opt_pair_term.hermitian_contract(
-                qpre0.get_pair(i), M0
+                pair0, M0
             ) + opt_pair_term.hermitian_contract(
-                qpre1.get_pair(j), M1
+                pair1, M1
             )
             new_pair.opt.ensure_hermitian_predicate()
             new_name = scope.append(new_pair.opt)
@@ -269,8 +264,8 @@ def qpre_extend(qpre : QPreTerm, all_qvarls : QvarlsTerm) -> QPreTerm:
     if not isinstance(qpre, QPreTerm) or not isinstance(all_qvarls, QvarlsTerm):
         raise ValueError()
     pairs = []
-    for i in range(len(qpre)):
-        new_pair = opt_pair_term.hermitian_extend(qpre.get_pair(i), all_qvarls)
+    for pair in qpre._opt_pairs:
+        new_pair = opt_pair_term.hermitian_extend(pair, all_qvarls)
         new_name = scope.append(new_pair.opt)
         new_pair = OptPairTerm(scope[new_name], new_pair.qvarls)
         pairs.append(new_pair)
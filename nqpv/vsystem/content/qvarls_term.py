@@ -19,12 +19,13 @@
 # defining the quantum variable list terms
 # ------------------------------------------------------------
 from __future__ import annotations
-from typing import Any, List, Tuple, Dict
+from typing import Any, List, Tuple, Dict, Iterable
 
 from nqpv.vsystem.var_scope import VVar
 from nqpv.vsystem.log_system import RuntimeErrorWithLog
 
 class QvarlsTerm(VVar):
+    __slots__ = ("_qvarls", "_qvar_set", "_str_cache")
 
     def __init__(self, qvarls : Tuple[str,...]):
         super().__init__()
@@ -45,6 +46,9 @@ class QvarlsTerm(VVar):
                 appeared.add(item)
 
         self._qvarls : Tuple[str,...] = qvarls
+        # for the membership tests in cover and join
+        self._qvar_set : frozenset[str] = frozenset(appeared)
+        self._str_cache : str | None = None
 
     @property
     def str_type(self) -> str:
@@ -67,14 +71,14 @@ class QvarlsTerm(VVar):
         else:
             return False
 
+    def __hash__(self) -> int:
+        return hash(self._qvarls)
+
     def __str__(self) -> str:
-        if len(self) == 0:
-            return "[]"
-        r = "[" + self._qvarls[0]
-        for i in range(1, len(self)):
-            r += " " + self._qvarls[i]
-        r += "]"
-        return r
+        # the list is immutable, so the string is built only once
+        if self._str_cache is None:
+            self._str_cache = "[" + " ".join(self._qvarls) + "]"
+        return self._str_cache
 
 
     def get_sub_correspond(self, arg_ls : QvarlsTerm) -> Dict[str, str]:
@@ -86,10 +90,7 @@ class QvarlsTerm(VVar):
         if self.qnum != arg_ls.qnum:
             raise ValueError()
 
-        cor : Dict[str, str] = {}
-        for i in range(self.qnum):
-            cor[self._qvarls[i]] = arg_ls._qvarls[i]
-        return cor
+        return dict(zip(self._qvarls, arg_ls._qvarls))
         
     
     def qvar_substitute(self, correspondence : Dict[str, str]) -> QvarlsTerm:
@@ -103,17 +104,18 @@ class QvarlsTerm(VVar):
             if not isinstance(new_qvar, str):
                 raise ValueError()
             new_qvarls.append(new_qvar)
-        
-        return QvarlsTerm(tuple(new_qvarls))
+
+        new_qvarls_tuple = tuple(new_qvarls)
+        # the list is immutable, so an identical substitution keeps this term
+        if new_qvarls_tuple == self._qvarls:
+            return self
+        return QvarlsTerm(new_qvarls_tuple)
 
     def cover(self, other : QvarlsTerm) -> bool:
         '''
         return whether this qvar list 'covers' the other qvar list
         '''
-        for qvar in other._qvarls:
-            if qvar not in self._qvarls:
-                return False
-        return True
+        return self._qvar_set.issuperset(other._qvarls)
 
     
     def join(self, other : QvarlsTerm) -> QvarlsTerm:
@@ -121,8 +123,40 @@ class QvarlsTerm(VVar):
         return the new qvarls term, which joins the new variables in 'other'
         at the end of 'self' list
         '''
-        new_qvarls = list(self._qvarls)
-        for qvar in other._qvarls:
-            if qvar not in new_qvarls:
-                new_qvarls.append(qvar)
-        return QvarlsTerm(tuple(new_qvarls))
\ No newline at end of file
+        # joining onto the empty list gives 'other' itself (the terms are immutable)
+        if len(self._qvarls) == 0:
+            return other
+        qvar_set = self._qvar_set
+        return QvarlsTerm(self._qvarls + tuple(qvar for qvar in other._qvarls if qvar not in qvar_set))
+
+    @staticmethod
+    def union_many(qvarls_ls : Iterable[QvarlsTerm]) -> QvarlsTerm:
+        '''
+        return the new qvarls term joining all the lists in order, in one pass
+        (the same result as chaining 'join')
+        '''
+        appeared = set()
+        new_qvarls = []
+        # the first nonempty list, which starts the result
+        first : QvarlsTerm | None = None
+        # sibling terms often share the same list object, which is walked only once
+        # (the dict keeps the terms alive, so their ids can not be reused)
+        seen : Dict[int, QvarlsTerm] = {}
+        for qvarls in qvarls_ls:
+            if id(qvarls) in seen:
+                continue
+            seen[id(qvarls)] = qvarls
+            if first is None or len(first._qvarls) == 0:
+                first = qvarls
+            for qvar in qvarls._qvarls:
+                if qvar not in appeared:
+                    appeared.add(qvar)
+                    new_qvarls.append(qvar)
+        # the terms are immutable, so a list covering all the others is returned itself
+        if first is not None and len(new_qvarls) == len(first._qvarls):
+            return first
+        return QvarlsTerm(tuple(new_qvarls))
+
+
+# the empty quantum variable list, shared by the terms
+EMPTY_QVARLS = QvarlsTerm(())
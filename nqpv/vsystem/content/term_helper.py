@@ -0,0 +1,50 @@
+'''
+ Copyright 2022 Yingte Xu
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+'''
+
+# ------------------------------------------------------------
+# term_helper.py
+#
+# helpers shared by the terms
+# ------------------------------------------------------------
+
+from __future__ import annotations
+from typing import Any, List
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def child_prefix(prefix : str) -> str:
+    '''
+    the prefix of the sub statements (one tab deeper)
+    (the prefixes are few, so each depth is built once and shared by all the terms)
+    '''
+    return prefix + "\t"
+
+def render_pieces(root : Any, prefix : str) -> str:
+    '''
+    the text of root, from the content_pieces of the terms: a string is output as it is,
+    and a pair (sub term, prefix) stands for the content of the sub term
+    (an explicit stack instead of recursion, so that deep terms do not hit the recursion limit)
+    '''
+    out : List[str] = []
+    todo : List[Any] = [(root, prefix)]
+    while todo:
+        piece = todo.pop()
+        if type(piece) is str:
+            out.append(piece)
+        else:
+            term, term_prefix = piece
+            todo.extend(reversed(term.content_pieces(term_prefix)))
+    return "".join(out)
@@ -19,7 +19,9 @@
 # quantum linear algebra tools needed in this verifier
 # ------------------------------------------------------------
 from __future__ import annotations
-from typing import Any, List, Tuple
+from typing import Any, List, Tuple, Dict
+
+from functools import lru_cache
 
 import numpy as np
 
@@ -44,6 +46,20 @@ def np_complex_norm(m : np.ndarray) -> np.ndarray:
     return np.sqrt(m.real * m.real + m.imag * m.imag)
 
 
+# the tolerance of the property checks in single precision (at least)
+SINGLE_PRECISION_EPS : float = 1e-5
+
+def _check_precision(matrix : np.ndarray) -> Tuple[np.ndarray, float]:
+    '''
+    return the matrix and the tolerance to use in the property checks
+    (with SINGLE_PRECISION_CHECK, the check runs on a complex64 copy with a relaxed tolerance)
+    '''
+    settings = VarScope.cur_settings()
+    if settings.SINGLE_PRECISION_CHECK:
+        return matrix.astype(np.complex64, copy=False), max(settings.EPS, SINGLE_PRECISION_EPS)
+    return matrix, settings.EPS
+
+
 def check_unity(m : np.ndarray) -> bool:
     '''
     check whether tensor m is unitary
@@ -61,11 +77,13 @@ def check_unity(m : np.ndarray) -> bool:
     
     # calculate the dim for matrix
     dim_m : int = 2**(len(m.shape)//2)
-    matrix = m.reshape((dim_m, dim_m))
+    matrix, eps = _check_precision(m.reshape((dim_m, dim_m)))
 
     # check the equality of U^dagger @ U and I
-
-    if not np_eps_equal(matrix @ np.transpose(np.conj(matrix)), np.eye(dim_m)):
+    # (the product is fresh, so I is subtracted in place instead of building np.eye)
+    diff = matrix @ np.transpose(np.conj(matrix))
+    diff[np.diag_indices(dim_m)] -= 1
+    if not np.max(np.abs(diff)) < eps:
         #LogSystem.channels["error"].append("The operator is not unitary.")
         return False
     return True
@@ -88,16 +106,17 @@ def check_hermitian_predicate(m : np.ndarray) -> bool:
     
     # calculate the dim for matrix
     dim_m = 2**(len(m.shape)//2)
-    matrix = m.reshape((dim_m, dim_m))
+    matrix, eps = _check_precision(m.reshape((dim_m, dim_m)))
 
     # check the equivalence of U^dagger @ U and I
-    if not np_eps_equal(matrix, np.transpose(np.conj(matrix))):
+    if not np.max(np_complex_norm(matrix - np.transpose(np.conj(matrix)))) < eps:
         #LogSystem.channels["error"].append("The operator is not a Hermitian operator.")
         return False
 
     # check 0 <= matrix <= I
-    e_vals = np.linalg.eigvals(matrix)
-    if np.any(e_vals < 0 - VarScope.cur_settings().EPS) or np.any(e_vals > 1 + VarScope.cur_settings().EPS):
+    # (matrix is hermitian here, so the real eigenvalues come from the symmetric solver)
+    e_vals = np.linalg.eigvalsh(matrix)
+    if np.any(e_vals < 0 - eps) or np.any(e_vals > 1 + eps):
         #LogSystem.channels["error"].append("The requirement 0 <= Predicate <= I is not satisfied.")
         return False
         
@@ -133,11 +152,26 @@ def check_measure(m : np.ndarray) -> bool:
         return False
     return True
 
+# the identity tensors up to this qubit number are kept (4^8 entries, 512 KB at most)
+_EYE_CACHE_QUBITN = 8
+
 def eye_tensor(qubitn : int) -> np.ndarray:
     '''
     return the identity matrix of 'qubitn' qubits, in the form of a (2,2,2,...) tensor, row indices in the front.
+    (the tensor is read-only, and shared for small qubit numbers)
     '''
-    return np.eye(2**qubitn).reshape((2,)*qubitn*2)
+    if qubitn <= _EYE_CACHE_QUBITN:
+        return _eye_tensor_shared(qubitn)
+    return _eye_tensor_new(qubitn)
+
+@lru_cache(maxsize=_EYE_CACHE_QUBITN + 1)
+def _eye_tensor_shared(qubitn : int) -> np.ndarray:
+    return _eye_tensor_new(qubitn)
+
+def _eye_tensor_new(qubitn : int) -> np.ndarray:
+    m = np.eye(1 << qubitn).reshape((2,)*qubitn*2)
+    m.setflags(write=False)
+    return m
 
 def dagger(M : np.ndarray) -> np.ndarray:
     '''
@@ -170,6 +204,49 @@ def hermitian_contract(qvar: Tuple[str,...], H : np.ndarray, qvar_act : Tuple[st
               |   |   |   |  ...  |   |
               0   1   2   3      n-2 n-1
 
+    '''
+    plan = _contract_plan(qvar, qvar_act)
+    if plan is None:
+        return _hermitian_contract_tensordot(qvar, H, qvar_act, M)
+
+    sub_M, sub_H, sub_Md, sub_out, path = plan
+    return np.einsum(M, sub_M, H, sub_H, np.conjugate(M), sub_Md, sub_out, optimize=path)
+
+# the number of index labels einsum accepts
+_EINSUM_LABEL_LIMIT = 52
+
+@lru_cache(maxsize=256)
+def _contract_plan(qvar: Tuple[str,...], qvar_act : Tuple[str,...]) -> Tuple[Tuple[int,...], Tuple[int,...], Tuple[int,...], Tuple[int,...], Tuple[Any,...]] | None:
+    '''
+    the einsum plan of hermitian_contract: the sublists (M, H, M^dagger by conjugate, output) and the contraction path
+    return None if the labels needed exceed the limit of einsum
+    '''
+    nH = len(qvar)
+    nM = len(qvar_act)
+    if 2*nH + 2*nM > _EINSUM_LABEL_LIMIT:
+        return None
+
+    # labels: H rows 0 ~ nH-1, H columns nH ~ 2nH-1, M rows 2nH ~ 2nH+nM-1, M^dagger rows 2nH+nM ~ 2nH+2nM-1
+    sub_H = list(range(2*nH))
+    pos_ls = [qvar.index(v) for v in qvar_act]
+    sub_M = [2*nH + j for j in range(nM)] + pos_ls
+    sub_Md = [2*nH + nM + j for j in range(nM)] + [p + nH for p in pos_ls]
+
+    sub_out = list(sub_H)
+    for j, p in enumerate(pos_ls):
+        sub_out[p] = 2*nH + j
+        sub_out[p + nH] = 2*nH + nM + j
+
+    # the path only depends on the shapes, so it is searched on operands of the right shapes without content
+    H_shape = np.broadcast_to(np.float64(0), (2,)*(2*nH))
+    M_shape = np.broadcast_to(np.float64(0), (2,)*(2*nM))
+    path = np.einsum_path(M_shape, sub_M, H_shape, sub_H, M_shape, sub_Md, sub_out, optimize='greedy')[0]
+
+    return tuple(sub_M), tuple(sub_H), tuple(sub_Md), tuple(sub_out), tuple(path)
+
+def _hermitian_contract_tensordot(qvar: Tuple[str,...], H : np.ndarray, qvar_act : Tuple[str,...], M : np.ndarray) -> np.ndarray:
+    '''
+    hermitian_contract by two tensordots, used when einsum runs out of index labels
     '''
     nH = len(qvar)
     nM = len(qvar_act)
@@ -206,19 +283,24 @@ def hermitian_contract(qvar: Tuple[str,...], H : np.ndarray, qvar_act : Tuple[st
 def hermitian_init(qvar: Tuple[str,...], H : np.ndarray, qvar_init: Tuple[str,...]) -> np.ndarray:
     '''
     initialize hermitian operator H at variables 'qvar_init'
+
+    The result is sum_i |i><0| H |0><i| on each variable of qvar_init, that is, <0|H|0> (the block of H
+    with all qvar_init at 0) extended by the identity on qvar_init. It is computed directly, instead of
+    by the contractions with |0><0| and |1><0|.
     '''
-    P0 = np.array([[1., 0.],
-                    [0., 0.]])
-    P1 = np.array([[0., 0.],
-                    [1., 0.]])
-    # initialize all the variables in order
-    tempH = H
+    nH = len(qvar)
+    # take the block of H with all the initialized variables at 0, on both the row and the column
+    index : List[Any] = [slice(None)] * (2*nH)
     for var in qvar_init:
-        a = hermitian_contract(qvar, tempH, (var,), P0)
-        b = hermitian_contract(qvar, tempH, (var,), P1)
-        tempH = a + b
-    
-    return tempH
+        pos = qvar.index(var)
+        index[pos] = 0
+        index[pos + nH] = 0
+    H0 = H[tuple(index)]
+    qvar_rest = tuple(v for v in qvar if v not in qvar_init)
+
+    res = np.zeros(H.shape, dtype = np.result_type(H, np.float64))
+    _add_extension(res, qvar, H0, qvar_rest)
+    return res
 
 def tensor_to_matrix(t : np.ndarray) -> np.ndarray:
     nM = len(t.shape)//2
@@ -229,28 +311,53 @@ def tensor_to_matrix(t : np.ndarray) -> np.ndarray:
 def hermitian_extend(qvar: Tuple[str,...], H : np.ndarray, qvar_H: Tuple[str,...]) -> np.ndarray:
     '''
     extend the given hermitian operator, according to all variables qvar, and return
+    (H is written on the diagonal of the other variables directly, without building the identity part)
     '''
-    nAll = len(qvar)
-    nH = len(qvar_H)
-    m_I = eye_tensor(nAll - nH)
+    res = np.zeros((2,)*(2*len(qvar)), dtype = np.result_type(H, np.float64))
+    _add_extension(res, qvar, H, qvar_H)
+    return res
 
-    temp = np.tensordot(H, m_I, ([],[]))
 
-    # rearrange the indices
+def hermitian_extend_add(qvar: Tuple[str,...], H1 : np.ndarray, qvar_1: Tuple[str,...], H2 : np.ndarray, qvar_2: Tuple[str,...]) -> np.ndarray:
+    '''
+    extend H1 (on qvar_1) and H2 (on qvar_2) according to all variables qvar, and return the sum
+    (the extensions are added into the result tensor directly, instead of being built one by one)
+    '''
+    res = np.zeros((2,)*(2*len(qvar)), dtype = np.result_type(H1, H2))
+    _add_extension(res, qvar, H1, qvar_1)
+    _add_extension(res, qvar, H2, qvar_2)
+    return res
+
+def _add_extension(res : np.ndarray, qvar: Tuple[str,...], H : np.ndarray, qvar_H: Tuple[str,...]) -> None:
+    '''
+    add H (on qvar_H), extended according to all variables qvar, into the tensor res in place
+    '''
+    sub_res, sub_view = _extend_sublists(qvar, qvar_H)
+    # the part of res where the extended variables are on the diagonal, as a writable view
+    view = np.einsum(res, sub_res, sub_view)
+    view += H.reshape(H.shape + (1,)*(view.ndim - H.ndim))
+
+@lru_cache(maxsize=256)
+def _extend_sublists(qvar: Tuple[str,...], qvar_H: Tuple[str,...]) -> Tuple[List[int], List[int]]:
+    '''
+    the einsum sublists to view a tensor on qvar as H (on qvar_H) times the diagonal of the other variables
+    labels: H rows 0 ~ nH-1, H columns nH ~ 2nH-1, then one label for each of the other variables
+    '''
+    nH = len(qvar_H)
     count_ext = 0
-    r_left = []
-    r_right = []
-    for i in range(nAll):
-        if qvar[i] in qvar_H:
-            pos = qvar_H.index(qvar[i])
-            r_left.append(pos)
-            r_right.append(nH + pos)
+    sub_left = []
+    sub_right = []
+    for v in qvar:
+        if v in qvar_H:
+            pos = qvar_H.index(v)
+            sub_left.append(pos)
+            sub_right.append(nH + pos)
         else:
-            r_left.append(2*nH + count_ext)
-            r_right.append(nAll + nH + count_ext)
+            sub_left.append(2*nH + count_ext)
+            sub_right.append(2*nH + count_ext)
             count_ext += 1
     
-    return temp.transpose(r_left + r_right)
+    return sub_left + sub_right, list(range(2*nH + count_ext))
 
 
 def get_opt_qnum(m : np.ndarray) -> int:
@@ -31,12 +31,14 @@ class Settings:
         self.SILENT = True
         self.IDENTICAL_VAR_CHECK = True
         self.OPT_PRESERVING = True
+        self.SINGLE_PRECISION_CHECK = False
 
     def __str__(self) -> str:
         r = "EPS : " + str(self.EPS) + " ;\n" +\
             "SDP precision : " + str(self.SDP_precision) + " ;\n" +\
             "SILENT : " + str(self.SILENT) + " ;\n"\
             "IDENTIVAL_VAR_CHECK : " + str(self.IDENTICAL_VAR_CHECK) + " ;\n" +\
-            "OPT_PRESERVING : " + str(self.OPT_PRESERVING)
+            "OPT_PRESERVING : " + str(self.OPT_PRESERVING) + " ;\n" +\
+            "SINGLE_PRECISION_CHECK : " + str(self.SINGLE_PRECISION_CHECK)
         return r
     
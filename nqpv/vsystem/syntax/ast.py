@@ -139,30 +139,27 @@ class AstQvarLs(Ast):
     def __init__(self, pos : PosInfo, data : List[AstID]):
         super().__init__(pos, "qvar list")
         self.data : List[AstID] = data
+        # the parser never modifies a node after construction, so the string can be kept
+        self._str_cache : str | None = None
     
     def __len__(self) -> int:
         return len(self.data)
 
     def __str__(self) -> str:
-        if len(self.data) == 0:
-            return "[]"
-
-        r = "[" + str(self.data[0])
-        for i in range(1, len(self.data)):
-            r += " " + str(self.data[i])
-        r += "]"
-        return r
+        if self._str_cache is None:
+            self._str_cache = "[" + " ".join([str(item) for item in self.data]) + "]"
+        return self._str_cache
 
 class AstVar(Ast):
     def __init__(self, pos : PosInfo, data : List[AstID]):
         super().__init__(pos, "variable")
         self.data : List[AstID] = data
+        self._str_cache : str | None = None
     
     def __str__(self) -> str:
-        r = str(self.data[0])
-        for i in range(1, len(self.data)):
-            r += "." + str(self.data[i])
-        return r
+        if self._str_cache is None:
+            self._str_cache = ".".join([str(item) for item in self.data])
+        return self._str_cache
 
 class AstID(Ast):
     def __init__(self, pos : PosInfo, id : str):
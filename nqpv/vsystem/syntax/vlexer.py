@@ -49,6 +49,7 @@ reserved = {
     'SILENT'    : 'SILENT',
     'IDENTICAL_VAR_CHECK'   : 'IDENTICAL_VAR_CHECK',
     'OPT_PRESERVING'    : 'OPT_PRESERVING',
+    'SINGLE_PRECISION_CHECK'    : 'SINGLE_PRECISION_CHECK',
 
     # inner calculation methods
     'import': 'IMPORT',
@@ -78,6 +78,8 @@ def p_setting(p):
             | SETTING IDENTICAL_VAR_CHECK ASSIGN FALSE END
             | SETTING OPT_PRESERVING ASSIGN TRUE END
             | SETTING OPT_PRESERVING ASSIGN FALSE END
+            | SETTING SINGLE_PRECISION_CHECK ASSIGN TRUE END
+            | SETTING SINGLE_PRECISION_CHECK ASSIGN FALSE END
     '''
 
     # FLOAT_NUM is already checked
@@ -85,7 +87,7 @@ def p_setting(p):
         p[0] = ast.AstSetting(PosInfo(p.slice[1].lineno), p[2], float(p[4]))
     elif p[2] == "SDP_PRECISION":
         p[0] = ast.AstSetting(PosInfo(p.slice[1].lineno), p[2], float(p[4]))
-    elif p[2] in ("SILENT", "IDENTICAL_VAR_CHECK", "OPT_PRESERVING"):
+    elif p[2] in ("SILENT", "IDENTICAL_VAR_CHECK", "OPT_PRESERVING", "SINGLE_PRECISION_CHECK"):
         if p[4] == "true":
             p[0] = ast.AstSetting(PosInfo(p.slice[1].lineno), p[2], True)
         else:
@@ -30,6 +30,7 @@ class VVar:
     '''
     the varibles for the verification system
     '''
+    __slots__ = ("name",)
 
     @property
     def str_type(self) -> str :
@@ -156,6 +156,8 @@ class VKernel:
                         new_kernel.cur_scope.settings.IDENTICAL_VAR_CHECK = cmd.data
                     elif cmd.setting_item == "OPT_PRESERVING":
                         new_kernel.cur_scope.settings.OPT_PRESERVING = cmd.data
+                    elif cmd.setting_item == "SINGLE_PRECISION_CHECK":
+                        new_kernel.cur_scope.settings.SINGLE_PRECISION_CHECK = cmd.data
                     else:
                         raise Exception()
 
@@ -232,15 +234,9 @@ class VKernel:
             pair = MeaPairTerm(opt, qvarls)
             return WhileTerm(pair, S)
         elif isinstance(data, ast.AstNondet):
-            prog_ls = []
-            for subprog in data.data:
-                prog_ls.append(self.eval_prog(subprog))
-            return NondetTerm(tuple(prog_ls))
+            return NondetTerm(tuple(self.eval_prog(subprog) for subprog in data.data))
         elif isinstance(data, ast.AstProgSeq):
-            prog_ls = []
-            for subprog in data.data:
-                prog_ls.append(self.eval_prog(subprog))
-            return ProgSttSeqTerm(tuple(prog_ls))
+            return ProgSttSeqTerm(tuple(self.eval_prog(subprog) for subprog in data.data))
         else:
             raise Exception()
 
@@ -274,20 +270,11 @@ class VKernel:
             pair = MeaPairTerm(opt, qvarls)
             return WhileHintTerm(inv, pair, P)
         elif isinstance(data, ast.AstNondetProof):
-            proof_ls = []
-            for subproof in data.data:
-                proof_ls.append(self.eval_proof_hint(subproof))
-            return NondetHintTerm(tuple(proof_ls))
+            return NondetHintTerm(tuple(self.eval_proof_hint(subproof) for subproof in data.data))
         elif isinstance(data, ast.AstUnionProof):
-            proof_ls = []
-            for subproof in data.data:
-                proof_ls.append(self.eval_proof_hint(subproof))
-            return UnionHintTerm(tuple(proof_ls))
+            return UnionHintTerm(tuple(self.eval_proof_hint(subproof) for subproof in data.data))
         elif isinstance(data, ast.AstProofSeq):
-            proof_ls = []
-            for subproof in data.data:
-                proof_ls.append(self.eval_proof_hint(subproof))
-            return ProofSeqHintTerm(tuple(proof_ls))
+            return ProofSeqHintTerm(tuple(self.eval_proof_hint(subproof) for subproof in data.data))
         elif isinstance(data, ast.AstPredicate):
             qpre = self.eval_qpre(data)
             return QPreHintTerm(qpre)